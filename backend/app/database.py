@@ -2,7 +2,7 @@
 Database configuration and session management for PostgreSQL with SQLAlchemy.
 """
 
-from sqlalchemy import create_engine, MetaData
+from sqlalchemy import create_engine, MetaData, text
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker, Session
 from sqlalchemy.pool import QueuePool
@@ -23,10 +23,15 @@ engine = create_engine(
     pool_size=10,
     max_overflow=20,
     pool_pre_ping=True,  # Verify connections before use
-    pool_recycle=3600,   # Recycle connections every hour
+    pool_recycle=1800,   # Recycle connections every 30 minutes
+    query_cache_size=1200,  # Keep compiled statements cached across health checks
     echo=settings.debug  # Log SQL queries in debug mode
 )
 
+# Health probe statements, built once and reused on pooled connections
+CONNECTION_CHECK_QUERY = text("SELECT 1")
+VERSION_QUERY = text("SELECT version()")
+
 # Create SessionLocal class
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
@@ -78,7 +83,7 @@ def check_database_connection() -> bool:
     """
     try:
         with engine.connect() as connection:
-            connection.execute("SELECT 1")
+            connection.execute(CONNECTION_CHECK_QUERY)
         logger.info("Database connection successful")
         return True
     except Exception as e:
@@ -93,7 +98,7 @@ def get_database_health() -> dict:
     """
     try:
         with engine.connect() as connection:
-            result = connection.execute("SELECT version()")
+            result = connection.execute(VERSION_QUERY)
             version = result.fetchone()[0]
         
         pool = engine.pool
@@ -147,6 +147,7 @@ class DocumentChunk(Base):
         Index('ix_chunks_document_chunk_index', 'document_id', 'chunk_index'),
         Index('ix_chunks_section_subsection', 'section', 'subsection'),
         Index('ix_chunks_financial_data', 'is_financial_data'),
+        Index('ix_chunks_char_count', 'character_count'),
     )
     
     def __repr__(self):
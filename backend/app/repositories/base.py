@@ -6,7 +6,7 @@ All specific repositories inherit from this base class.
 from typing import Generic, TypeVar, Type, List, Optional, Dict, Any
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import SQLAlchemyError
-from sqlalchemy import and_, or_, desc, asc
+from sqlalchemy import and_, or_, desc, asc, insert
 import logging
 
 from app.database import Base
@@ -206,10 +206,29 @@ class BaseRepository(Generic[ModelType]):
             logger.error(f"Error checking existence of {self.model.__name__} with ID {id}: {e}")
             raise
     
+    def _check_bulk_keys(self, objects: List[Dict[str, Any]]) -> None:
+        """
+        Reject keys that are not attributes of the model.
+        
+        ORM bulk INSERT drops unknown keys silently, whereas constructing
+        the model raises, so the check restores the constructor's behaviour.
+        
+        Raises:
+            TypeError: If any row has a key the model does not define
+        """
+        valid_keys = set(self.model.__mapper__.attrs.keys())
+        for obj in objects:
+            for key in obj:
+                if key not in valid_keys:
+                    raise TypeError(f"{key!r} is an invalid keyword argument for {self.model.__name__}")
+    
     def bulk_create(self, objects: List[Dict[str, Any]]) -> List[ModelType]:
         """
         Create multiple records in a single transaction.
         
+        Rows are sent as one batched INSERT ... RETURNING rather than one
+        INSERT per ORM object, so there is no per-row refresh round-trip.
+        
         Args:
             objects: List of dictionaries with field values
             
@@ -217,19 +236,56 @@ class BaseRepository(Generic[ModelType]):
             List of created model instances
             
         Raises:
+            TypeError: If a row has a key the model does not define
             SQLAlchemyError: If database operation fails
         """
         try:
-            db_objects = [self.model(**obj) for obj in objects]
-            self.db.add_all(db_objects)
-            self.db.commit()
+            if not objects:
+                return []
             
-            for db_obj in db_objects:
-                self.db.refresh(db_obj)
+            self._check_bulk_keys(objects)
+            db_objects = list(self.db.scalars(
+                insert(self.model).returning(self.model, sort_by_parameter_order=True),
+                objects
+            ))
+            self.db.commit()
             
             logger.info(f"Bulk created {len(db_objects)} {self.model.__name__} records")
             return db_objects
         except SQLAlchemyError as e:
             logger.error(f"Error bulk creating {self.model.__name__}: {e}")
             self.db.rollback()
+            raise
+    
+    def bulk_core_insert(self, objects: List[Dict[str, Any]]) -> int:
+        """
+        Insert multiple records without loading them back as ORM objects.
+        
+        Rows go through an ORM bulk INSERT, which groups them by key set
+        so rows may supply different columns, and skips RETURNING and the
+        identity map. Use bulk_create when the created instances are needed.
+        
+        Args:
+            objects: List of dictionaries with field values
+            
+        Returns:
+            Number of rows inserted
+            
+        Raises:
+            TypeError: If a row has a key the model does not define
+            SQLAlchemyError: If database operation fails
+        """
+        try:
+            if not objects:
+                return 0
+            
+            self._check_bulk_keys(objects)
+            self.db.execute(insert(self.model), objects)
+            self.db.commit()
+            
+            logger.info(f"Bulk inserted {len(objects)} {self.model.__name__} records")
+            return len(objects)
+        except SQLAlchemyError as e:
+            logger.error(f"Error bulk inserting {self.model.__name__}: {e}")
+            self.db.rollback()
             raise
\ No newline at end of file
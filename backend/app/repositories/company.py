@@ -288,12 +288,12 @@ class CompanyRepository(BaseRepository[Company]):
             self.db.rollback()
             raise
     
-    def get_sector_statistics(self) -> List[Dict[str, Any]]:
+    def get_sector_statistics(self) -> Dict[str, Dict[str, Any]]:
         """
         Get statistics about companies by sector.
         
         Returns:
-            List of dictionaries with sector statistics
+            Dictionary mapping sector name to its statistics
         """
         try:
             results = self.db.query(
@@ -306,15 +306,14 @@ class CompanyRepository(BaseRepository[Company]):
                 Company.sector.isnot(None)
             ).group_by(Company.sector).all()
             
-            return [
-                {
-                    'sector': result.sector,
+            return {
+                result.sector: {
                     'company_count': result.company_count,
                     'avg_market_cap': float(result.avg_market_cap) if result.avg_market_cap else 0,
                     'total_market_cap': float(result.total_market_cap) if result.total_market_cap else 0
                 }
                 for result in results
-            ]
+            }
         except SQLAlchemyError as e:
             logger.error(f"Error getting sector statistics: {e}")
             raise
\ No newline at end of file
@@ -5,7 +5,7 @@ Provides specialized methods for document-specific queries and operations.
 
 from typing import List, Optional, Dict, Any
 from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import and_, or_, desc, func
+from sqlalchemy import and_, or_, desc, func, case
 from sqlalchemy.exc import SQLAlchemyError
 from datetime import datetime, timedelta
 import logging
@@ -297,15 +297,22 @@ class DocumentRepository(BaseRepository[Document]):
             Dictionary with filing statistics
         """
         try:
-            query = self.db.query(Document)
+            # Status counts in a single pass using conditional aggregates
+            status_counts = self.db.query(
+                func.count(Document.id).label('total'),
+                func.sum(case((Document.processing_status == "completed", 1), else_=0)).label('processed'),
+                func.sum(case((Document.processing_status.in_(["pending", "processing"]), 1), else_=0)).label('pending'),
+                func.sum(case((Document.processing_status == "failed", 1), else_=0)).label('failed')
+            )
             
             if ticker:
-                query = query.filter(Document.ticker == ticker.upper())
+                status_counts = status_counts.filter(Document.ticker == ticker.upper())
             
-            total_documents = query.count()
-            processed_documents = query.filter(Document.processing_status == "completed").count()
-            pending_documents = query.filter(Document.processing_status.in_(["pending", "processing"])).count()
-            failed_documents = query.filter(Document.processing_status == "failed").count()
+            counts = status_counts.one()
+            total_documents = counts.total
+            processed_documents = counts.processed or 0
+            pending_documents = counts.pending or 0
+            failed_documents = counts.failed or 0
             
             # Get filing type breakdown
             filing_types = self.db.query(
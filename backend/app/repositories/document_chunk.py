@@ -4,7 +4,7 @@ Provides specialized methods for chunk-specific queries and operations.
 """
 
 from typing import List, Optional, Dict, Any
-from sqlalchemy.orm import Session, joinedload
+from sqlalchemy.orm import Session, joinedload, selectinload
 from sqlalchemy import and_, or_, desc, func, text
 from sqlalchemy.exc import SQLAlchemyError
 from datetime import datetime
@@ -136,7 +136,10 @@ class DocumentChunkRepository(BaseRepository[DocumentChunk]):
             List of financial data chunks
         """
         try:
-            query = self.db.query(DocumentChunk).filter(
+            # Eager-load document and company in two extra queries regardless of chunk count
+            query = self.db.query(DocumentChunk).options(
+                selectinload(DocumentChunk.document).selectinload(Document.company)
+            ).filter(
                 DocumentChunk.is_financial_data == True
             )
             
@@ -199,7 +202,16 @@ class DocumentChunkRepository(BaseRepository[DocumentChunk]):
             List of matching chunks
         """
         try:
+            # Chunks shorter than the shortest possible match cannot match; the
+            # integer comparison prunes them before the substring scan. '%' can
+            # match nothing and an escape character matches nothing itself, so
+            # neither counts towards that length.
+            min_length = len(search_term) - search_term.count('%') - search_term.count('\\')
             query = self.db.query(DocumentChunk).filter(
+                or_(
+                    DocumentChunk.character_count.is_(None),
+                    DocumentChunk.character_count >= min_length
+                ),
                 DocumentChunk.content.ilike(f"%{search_term}%")
             )
             
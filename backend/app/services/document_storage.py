@@ -7,10 +7,12 @@ import asyncio
 import hashlib
 import logging
 import os
+import uuid
 from datetime import datetime
 from pathlib import Path
-from typing import List, Optional, Dict, Callable, Any, Tuple
+from typing import List, Optional, Dict, Callable, Any, Tuple, Union, Iterable, BinaryIO
 import httpx
+from sqlalchemy import select
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import SQLAlchemyError
 import aiofiles
@@ -21,11 +23,92 @@ import time
 from app.models.database import Document, Company
 from app.repositories.document import DocumentRepository
 from app.repositories.company import CompanyRepository
-from app.services.sec_edgar_scraper import Filing, SECEdgarScraper
+from app.services.sec_edgar_scraper import Filing, RateLimiter, SECEdgarScraper
 from app.config import settings
 
 logger = logging.getLogger(__name__)
 
+# Block size for streaming documents to disk; each aiofiles write is one
+# thread-pool hop, so 1 MiB blocks keep multi-MB filings to a few hops
+WRITE_BLOCK_SIZE = 1 << 20
+
+# Block size used when hashing document content incrementally
+HASH_BLOCK_SIZE = 64 * 1024
+
+# hashlib is backed by OpenSSL when available, which uses SHA-NI / ARMv8 SHA2
+# instructions; the built-in fallback is roughly an order of magnitude slower
+OPENSSL_SHA256 = hashlib.sha256.__module__ == '_hashlib'
+if not OPENSSL_SHA256:
+    logger.warning("hashlib.sha256 is not backed by OpenSSL; document hashing will be slow")
+
+# Minimum seconds between intermediate download progress notifications
+PROGRESS_INTERVAL = 0.1
+
+# Maximum number of orphaned files unlinked concurrently
+MAX_CONCURRENT_UNLINKS = 32
+
+# Media type (without parameters such as charset) to document format
+_CT_TO_FMT = {
+    'text/html': 'HTML',
+    'application/xhtml+xml': 'HTML',
+    'application/pdf': 'PDF',
+    'application/xml': 'XBRL',
+    'text/xml': 'XBRL',
+    'application/xbrl+xml': 'XBRL',
+    'text/plain': 'TXT',
+}
+
+# Lowercased file extension to document format
+_EXT_TO_FMT = {
+    '.html': 'HTML',
+    '.htm': 'HTML',
+    '.pdf': 'PDF',
+    '.xml': 'XBRL',
+    '.xbrl': 'XBRL',
+    '.txt': 'TXT',
+}
+
+
+def _scan_files(root: Union[str, Path]) -> Iterable[os.DirEntry]:
+    """
+    Yield directory entries for all regular files below root.
+    
+    Uses os.scandir so file type and size come from the cached DirEntry
+    data instead of separate stat calls per path.
+    
+    Args:
+        root: Directory to walk
+        
+    Yields:
+        DirEntry for each file
+    """
+    stack = [root]
+    while stack:
+        with os.scandir(stack.pop()) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(entry.path)
+                elif entry.is_file():
+                    yield entry
+
+
+def _walk_sizes(root: Union[str, Path]) -> Tuple[int, int]:
+    """
+    Sum file sizes below root.
+    
+    Args:
+        root: Directory to walk
+        
+    Returns:
+        Tuple of (total_size_bytes, file_count)
+    """
+    total_size = 0
+    file_count = 0
+    for entry in _scan_files(root):
+        total_size += entry.stat().st_size
+        file_count += 1
+    return total_size, file_count
+
 
 class DocumentStorageService:
     """
@@ -36,9 +119,13 @@ class DocumentStorageService:
     def __init__(self, 
                  db: Session,
                  storage_path: str = None,
-                 max_concurrent_downloads: int = 3,
+                 max_concurrent_downloads: int = 16,
                  retry_attempts: int = 3,
-                 retry_delay: float = 1.0):
+                 retry_delay: float = 1.0,
+                 requests_per_second: float = 9.0,
+                 batched: bool = False,
+                 flush_threshold: int = 50,
+                 rate_limiter: Optional[RateLimiter] = None):
         """
         Initialize document storage service.
         
@@ -48,6 +135,12 @@ class DocumentStorageService:
             max_concurrent_downloads: Maximum concurrent downloads
             retry_attempts: Number of retry attempts for failed downloads
             retry_delay: Delay between retry attempts in seconds
+            requests_per_second: Request rate cap shared by all downloads
+                (SEC EDGAR allows at most 10 requests per second)
+            batched: Buffer document records and bulk insert them in batches
+            flush_threshold: Number of buffered documents that triggers a flush
+            rate_limiter: SEC request limiter to share with other services; one is
+                created from requests_per_second if not given
         """
         self.db = db
         self.document_repo = DocumentRepository(db)
@@ -62,15 +155,41 @@ class DocumentStorageService:
         self.retry_attempts = retry_attempts
         self.retry_delay = retry_delay
         
-        # HTTP client for downloads
+        # HTTP client for downloads, with a connection pool sized to the worker count
         self.client = httpx.AsyncClient(
             timeout=60.0,
             follow_redirects=True,
+            limits=httpx.Limits(
+                max_connections=max_concurrent_downloads * 2,
+                max_keepalive_connections=max_concurrent_downloads
+            ),
             headers={
                 "User-Agent": f"{settings.app_name} afikdanan@google.com"
             }
         )
         
+        # Downloads are latency bound, so throughput is capped by SEC's rate limit
+        # rather than by the number of workers. The scraper draws from the same
+        # limiter, so scraping and downloading together stay under the cap.
+        self.rate_limiter = rate_limiter or RateLimiter(requests_per_second=requests_per_second)
+        
+        # SEC scraper reused by every process_company_filings call on this
+        # instance. ProcessingService builds one instance per job, so in
+        # production the scraper lives for a single job.
+        self._scraper = SECEdgarScraper()
+        self._scraper.rate_limiter = self.rate_limiter
+        
+        # Batched document inserts
+        self.batched = batched
+        self._flush_threshold = flush_threshold
+        self._pending_docs: List[Document] = []
+        
+        # Directories already created under storage_path
+        self._ensured_dirs: set = set()
+        
+        # Companies looked up while storing the current batch, keyed by ticker
+        self._company_cache: Dict[str, Company] = {}
+        
         # Progress tracking
         self._progress_callbacks: List[Callable] = []
     
@@ -83,8 +202,9 @@ class DocumentStorageService:
         await self.close()
     
     async def close(self):
-        """Close HTTP client and cleanup resources"""
+        """Close HTTP clients and cleanup resources"""
         await self.client.aclose()
+        await self._scraper.close()
     
     def add_progress_callback(self, callback: Callable[[str, int, int], None]):
         """
@@ -95,9 +215,10 @@ class DocumentStorageService:
         """
         self._progress_callbacks.append(callback)
     
-    async def _notify_progress(self, status: str, current: int, total: int):
-        """Notify all progress callbacks"""
-        for callback in self._progress_callbacks:
+    async def _notify_progress(self, status: str, current: int, total: int,
+                               callbacks: Optional[List[Callable]] = None):
+        """Notify the given progress callbacks, or all registered ones"""
+        for callback in self._progress_callbacks if callbacks is None else callbacks:
             try:
                 if asyncio.iscoroutinefunction(callback):
                     await callback(status, current, total)
@@ -119,7 +240,7 @@ class DocumentStorageService:
         # Create directory structure: ticker/year/filing_type/
         year = filing.filing_date.year
         directory = self.storage_path / filing.ticker / str(year) / filing.filing_type
-        directory.mkdir(parents=True, exist_ok=True)
+        self._ensure_dir(directory)
         
         # Generate filename: accession_number.extension
         parsed_url = urlparse(filing.document_url)
@@ -131,27 +252,65 @@ class DocumentStorageService:
         
         return directory / filename
     
-    def _calculate_content_hash(self, content: bytes) -> str:
+    def _ensure_dir(self, directory: Path):
+        """
+        Create a directory once per service instance.
+        
+        Filings in a batch mostly share a ticker/year/filing_type directory,
+        so repeated mkdir calls for it are skipped.
+        
+        Args:
+            directory: Directory path
+        """
+        if directory not in self._ensured_dirs:
+            directory.mkdir(parents=True, exist_ok=True)
+            self._ensured_dirs.add(directory)
+    
+    def _calculate_content_hash(self, source: Union[bytes, bytearray, memoryview, Iterable[bytes], BinaryIO]) -> str:
         """
         Calculate SHA-256 hash of document content.
         
+        Large filings can be hashed incrementally by passing an iterable of
+        byte chunks or a binary file object instead of the full content.
+        Chunks may be any bytes-like object (bytes, bytearray, memoryview);
+        each is fed to the hasher as-is and never joined into one buffer.
+        
         Args:
-            content: Document content bytes
+            source: Document content bytes, iterable of byte chunks, or binary file object
             
         Returns:
             Hexadecimal hash string
         """
-        return hashlib.sha256(content).hexdigest()
+        if isinstance(source, (bytes, bytearray, memoryview)):
+            return hashlib.sha256(source).hexdigest()
+        
+        if hasattr(source, 'read') and hasattr(hashlib, 'file_digest'):
+            # Python 3.11+: buffered C-level read loop feeding OpenSSL directly
+            return hashlib.file_digest(source, 'sha256').hexdigest()
+        
+        hasher = hashlib.sha256()
+        if hasattr(source, 'read'):
+            for block in iter(lambda: source.read(HASH_BLOCK_SIZE), b''):
+                hasher.update(block)
+        else:
+            for chunk in source:
+                hasher.update(chunk)
+        return hasher.hexdigest()
     
-    async def _download_document_content(self, url: str) -> Tuple[bytes, str]:
+    async def _stream_download_to_disk(self, url: str, file_path: Path) -> Tuple[int, str, Optional[str]]:
         """
-        Download document content with retry logic.
+        Download a document straight to disk in a single streaming pass.
+        
+        Each chunk is written as it arrives and the leading bytes are sniffed
+        for format detection, so the content is never buffered in memory or
+        traversed more than once.
         
         Args:
             url: Document URL
+            file_path: Local file path
             
         Returns:
-            Tuple of (content_bytes, content_type)
+            Tuple of (file_size, content_type, sniffed_format)
             
         Raises:
             httpx.HTTPError: If download fails after all retries
@@ -160,13 +319,25 @@ class DocumentStorageService:
         
         for attempt in range(self.retry_attempts):
             try:
-                logger.debug(f"Downloading document (attempt {attempt + 1}): {url}")
+                logger.debug(f"Streaming document (attempt {attempt + 1}): {url}")
                 
-                response = await self.client.get(url)
-                response.raise_for_status()
+                file_size = 0
+                sniffed_format = None
                 
-                content_type = response.headers.get('content-type', 'text/html')
-                return response.content, content_type
+                await self.rate_limiter.wait()
+                async with self.client.stream("GET", url) as response:
+                    response.raise_for_status()
+                    content_type = response.headers.get('content-type', 'text/html')
+                    
+                    async with aiofiles.open(file_path, 'wb') as f:
+                        async for chunk in response.aiter_bytes(WRITE_BLOCK_SIZE):
+                            if file_size == 0:
+                                sniffed_format = self._sniff_document_format(chunk)
+                            await f.write(chunk)
+                            file_size += len(chunk)
+                
+                logger.debug(f"Saved document to {file_path} ({file_size} bytes)")
+                return file_size, content_type, sniffed_format
                 
             except httpx.HTTPError as e:
                 last_exception = e
@@ -176,67 +347,55 @@ class DocumentStorageService:
                     await asyncio.sleep(self.retry_delay * (2 ** attempt))  # Exponential backoff
                 continue
         
-        # All attempts failed
+        # All attempts failed; don't leave a partial file behind
+        file_path.unlink(missing_ok=True)
         logger.error(f"Failed to download document after {self.retry_attempts} attempts: {url}")
         raise last_exception
     
-    async def _save_document_to_disk(self, content: bytes, file_path: Path) -> int:
+    def _sniff_document_format(self, head: bytes) -> Optional[str]:
         """
-        Save document content to disk.
+        Detect document format from the leading bytes of its content.
         
         Args:
-            content: Document content bytes
-            file_path: Local file path
+            head: First bytes of the document
             
         Returns:
-            File size in bytes
+            Document format string or None if not recognized
         """
-        try:
-            async with aiofiles.open(file_path, 'wb') as f:
-                await f.write(content)
-            
-            file_size = len(content)
-            logger.debug(f"Saved document to {file_path} ({file_size} bytes)")
-            return file_size
-            
-        except Exception as e:
-            logger.error(f"Failed to save document to {file_path}: {e}")
-            raise
+        head = head[:64].lstrip().lower()
+        if head.startswith(b'%pdf'):
+            return 'PDF'
+        if head.startswith(b'<!doctype html') or head.startswith(b'<html'):
+            return 'HTML'
+        return None
     
-    def _detect_document_format(self, content_type: str, file_path: Path) -> str:
+    def _detect_document_format(self,
+                                content_type: str,
+                                file_path: Path,
+                                sniffed_format: Optional[str] = None) -> str:
         """
-        Detect document format from content type and file extension.
+        Detect document format from content type, sniffed content and file extension.
         
         Args:
             content_type: HTTP content type
             file_path: File path
+            sniffed_format: Format detected from the leading content bytes, if any
             
         Returns:
             Document format string (HTML, PDF, XBRL, TXT)
         """
-        # Check content type first
-        if 'html' in content_type.lower():
-            return 'HTML'
-        elif 'pdf' in content_type.lower():
-            return 'PDF'
-        elif 'xml' in content_type.lower() or 'xbrl' in content_type.lower():
-            return 'XBRL'
-        elif 'text' in content_type.lower():
-            return 'TXT'
-        
-        # Check file extension
-        extension = file_path.suffix.lower()
-        if extension == '.html' or extension == '.htm':
-            return 'HTML'
-        elif extension == '.pdf':
-            return 'PDF'
-        elif extension == '.xml' or extension == '.xbrl':
-            return 'XBRL'
-        elif extension == '.txt':
-            return 'TXT'
-        
-        # Default to HTML for SEC filings
-        return 'HTML'
+        # Check content type first, ignoring parameters such as charset
+        media_type = content_type.split(';', 1)[0].strip().lower()
+        document_format = _CT_TO_FMT.get(media_type)
+        if document_format:
+            return document_format
+        
+        # Fall back to the sniffed content signature
+        if sniffed_format:
+            return sniffed_format
+        
+        # Check file extension, defaulting to HTML for SEC filings
+        return _EXT_TO_FMT.get(file_path.suffix.lower(), 'HTML')
     
     async def _check_document_exists(self, filing: Filing) -> Optional[Document]:
         """
@@ -272,19 +431,24 @@ class DocumentStorageService:
             Created document record
         """
         try:
-            # Ensure company exists
-            company = self.company_repo.get(filing.ticker)
-            if not company:
-                # Create company record if it doesn't exist
-                company = Company(
-                    ticker=filing.ticker,
-                    name=filing.company_name,
-                    cik_str=int(filing.cik)
-                )
-                company = self.company_repo.create(company)
-            
-            # Create document record
+            # Ensure company exists, reusing lookups from earlier filings in the batch
+            company = self._company_cache.get(filing.ticker)
+            if company is None:
+                company = self.company_repo.get(filing.ticker)
+                if not company:
+                    # Create company record if it doesn't exist
+                    company = Company(
+                        ticker=filing.ticker,
+                        name=filing.company_name,
+                        cik_str=int(filing.cik)
+                    )
+                    company = self.company_repo.create(company)
+                self._company_cache[filing.ticker] = company
+            
+            # Create document record; the ID is assigned up front so buffered
+            # records can be referenced before they are flushed
             document = Document(
+                id=str(uuid.uuid4()),
                 ticker=filing.ticker,
                 filing_type=filing.filing_type,
                 accession_number=filing.accession_number,
@@ -297,12 +461,43 @@ class DocumentStorageService:
                 processing_status="pending"
             )
             
-            return self.document_repo.create(document)
+            if not self.batched:
+                return self.document_repo.create(document)
+            
+            # Buffered until download_and_store_filings flushes the batch
+            self._pending_docs.append(document)
+            return document
             
         except SQLAlchemyError as e:
             logger.error(f"Error creating document record: {e}")
             raise
     
+    async def _flush_documents(self) -> List[Document]:
+        """
+        Bulk insert buffered document records in a single transaction.
+        
+        If the insert fails the batch is rolled back and the files saved for
+        its documents are removed, so nothing is left on disk without a record.
+        
+        Returns:
+            Documents inserted (empty if the insert failed)
+        """
+        if not self._pending_docs:
+            return []
+        
+        pending_docs, self._pending_docs = self._pending_docs, []
+        try:
+            self.db.bulk_save_objects(pending_docs)
+            self.db.commit()
+            logger.info(f"Inserted {len(pending_docs)} document records")
+            return pending_docs
+        except SQLAlchemyError as e:
+            logger.error(f"Error inserting {len(pending_docs)} document records: {e}")
+            self.db.rollback()
+            for document in pending_docs:
+                Path(document.file_path).unlink(missing_ok=True)
+            return []
+    
     async def download_and_store_filing(self, filing: Filing) -> Optional[Document]:
         """
         Download and store a single SEC filing.
@@ -323,15 +518,14 @@ class DocumentStorageService:
             # Generate file path
             file_path = self._generate_file_path(filing)
             
-            # Download document content
+            # Download and save in a single streaming pass
             logger.info(f"Downloading filing: {filing.accession_number}")
-            content, content_type = await self._download_document_content(filing.document_url)
+            file_size, content_type, sniffed_format = await self._stream_download_to_disk(
+                filing.document_url, file_path
+            )
             
             # Detect document format
-            document_format = self._detect_document_format(content_type, file_path)
-            
-            # Save to disk
-            file_size = await self._save_document_to_disk(content, file_path)
+            document_format = self._detect_document_format(content_type, file_path, sniffed_format)
             
             # Create database record
             document = await self._create_document_record(
@@ -353,7 +547,7 @@ class DocumentStorageService:
         
         Args:
             filings: List of Filing objects to download
-            progress_callback: Optional progress callback function
+            progress_callback: Optional progress callback function for this call only
             
         Returns:
             List of successfully stored Document records
@@ -363,47 +557,63 @@ class DocumentStorageService:
         
         logger.info(f"Starting download of {len(filings)} filings")
         
-        # Add progress callback if provided
-        if progress_callback:
-            self.add_progress_callback(progress_callback)
+        # A per-call callback only hears about this call's filings
+        callbacks = self._progress_callbacks + ([progress_callback] if progress_callback else [])
         
         # Track progress
         total_filings = len(filings)
         completed_filings = 0
         successful_documents = []
         
-        # Create semaphore for concurrency control
-        semaphore = asyncio.Semaphore(self.max_concurrent_downloads)
+        # Queue all filings up front and drain them with a fixed pool of workers,
+        # so only max_concurrent_downloads coroutines are alive at any time
+        queue: asyncio.Queue = asyncio.Queue()
+        for filing in filings:
+            queue.put_nowait(filing)
+        
+        # Intermediate progress is coalesced to one notification per PROGRESS_INTERVAL;
+        # the initial and final notifications are always delivered
+        loop = asyncio.get_running_loop()
+        last_progress_time = loop.time()
         
-        async def download_with_semaphore(filing: Filing) -> Optional[Document]:
-            nonlocal completed_filings
+        async def download_worker():
+            nonlocal completed_filings, last_progress_time
             
-            async with semaphore:
+            while True:
+                try:
+                    filing = queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+                
                 try:
                     document = await self.download_and_store_filing(filing)
-                    if document:
+                    # Buffered records only count once their batch is flushed
+                    if document and document not in self._pending_docs:
                         successful_documents.append(document)
-                    
-                    completed_filings += 1
-                    await self._notify_progress("downloading", completed_filings, total_filings)
-                    
-                    return document
-                    
+                    if self.batched and len(self._pending_docs) >= self._flush_threshold:
+                        successful_documents.extend(await self._flush_documents())
                 except Exception as e:
                     logger.error(f"Error downloading filing {filing.accession_number}: {e}")
-                    completed_filings += 1
-                    await self._notify_progress("downloading", completed_filings, total_filings)
-                    return None
+                
+                completed_filings += 1
+                now = loop.time()
+                if now - last_progress_time >= PROGRESS_INTERVAL:
+                    last_progress_time = now
+                    await self._notify_progress("downloading", completed_filings, total_filings, callbacks)
         
         # Start initial progress notification
-        await self._notify_progress("downloading", 0, total_filings)
+        await self._notify_progress("downloading", 0, total_filings, callbacks)
         
         # Execute downloads concurrently
-        tasks = [download_with_semaphore(filing) for filing in filings]
-        await asyncio.gather(*tasks, return_exceptions=True)
+        worker_count = min(self.max_concurrent_downloads, total_filings)
+        workers = [download_worker() for _ in range(worker_count)]
+        await asyncio.gather(*workers, return_exceptions=True)
+        
+        # Insert any documents still buffered below the flush threshold
+        successful_documents.extend(await self._flush_documents())
         
         # Final progress notification
-        await self._notify_progress("completed", total_filings, total_filings)
+        await self._notify_progress("completed", total_filings, total_filings, callbacks)
         
         logger.info(f"Download completed: {len(successful_documents)}/{total_filings} successful")
         return successful_documents
@@ -430,58 +640,56 @@ class DocumentStorageService:
         try:
             logger.info(f"Starting filing processing for {ticker} ({years} years)")
             
-            # Initialize SEC scraper
-            async with SECEdgarScraper() as scraper:
-                # Scrape filings
-                if progress_callback:
-                    await progress_callback("scraping", 0, 100)
-                
-                filings = await scraper.scrape_filings(ticker, years, filing_types)
-                
-                if not filings:
-                    logger.warning(f"No filings found for {ticker}")
-                    return {
-                        "ticker": ticker,
-                        "status": "completed",
-                        "filings_found": 0,
-                        "documents_stored": 0,
-                        "processing_time": time.time() - start_time,
-                        "error": None
-                    }
-                
-                # Download and store documents
-                if progress_callback:
-                    await progress_callback("downloading", 25, 100)
-                
-                # Create progress wrapper for download phase
-                async def download_progress(status: str, current: int, total: int):
-                    # Map download progress to overall progress (25-100%)
-                    progress_percent = 25 + int((current / total) * 75)
-                    await progress_callback("downloading", progress_percent, 100)
-                
-                documents = await self.download_and_store_filings(
-                    filings, 
-                    download_progress if progress_callback else None
-                )
-                
-                # Final progress update
-                if progress_callback:
-                    await progress_callback("completed", 100, 100)
-                
-                processing_time = time.time() - start_time
-                
-                result = {
+            # Scrape filings
+            if progress_callback:
+                await progress_callback("scraping", 0, 100)
+            
+            filings = await self._scraper.scrape_filings(ticker, years, filing_types)
+            
+            if not filings:
+                logger.warning(f"No filings found for {ticker}")
+                return {
                     "ticker": ticker,
                     "status": "completed",
-                    "filings_found": len(filings),
-                    "documents_stored": len(documents),
-                    "processing_time": processing_time,
+                    "filings_found": 0,
+                    "documents_stored": 0,
+                    "processing_time": time.time() - start_time,
                     "error": None
                 }
-                
-                logger.info(f"Filing processing completed for {ticker}: {result}")
-                return result
-                
+            
+            # Download and store documents
+            if progress_callback:
+                await progress_callback("downloading", 25, 100)
+            
+            # Create progress wrapper for download phase
+            async def download_progress(status: str, current: int, total: int):
+                # Map download progress to overall progress (25-100%)
+                progress_percent = 25 + int((current / total) * 75)
+                await progress_callback("downloading", progress_percent, 100)
+            
+            documents = await self.download_and_store_filings(
+                filings, 
+                download_progress if progress_callback else None
+            )
+            
+            # Final progress update
+            if progress_callback:
+                await progress_callback("completed", 100, 100)
+            
+            processing_time = time.time() - start_time
+            
+            result = {
+                "ticker": ticker,
+                "status": "completed",
+                "filings_found": len(filings),
+                "documents_stored": len(documents),
+                "processing_time": processing_time,
+                "error": None
+            }
+            
+            logger.info(f"Filing processing completed for {ticker}: {result}")
+            return result
+            
         except Exception as e:
             processing_time = time.time() - start_time
             error_msg = f"Failed to process filings for {ticker}: {str(e)}"
@@ -498,6 +706,10 @@ class DocumentStorageService:
                 "processing_time": processing_time,
                 "error": error_msg
             }
+        
+        finally:
+            # Company rows may change between runs; only reuse them within one
+            self._company_cache.clear()
     
     def get_storage_statistics(self) -> Dict[str, Any]:
         """
@@ -508,13 +720,7 @@ class DocumentStorageService:
         """
         try:
             # Calculate total storage size
-            total_size = 0
-            file_count = 0
-            
-            for file_path in self.storage_path.rglob('*'):
-                if file_path.is_file():
-                    total_size += file_path.stat().st_size
-                    file_count += 1
+            total_size, file_count = _walk_sizes(self.storage_path)
             
             # Get database statistics
             db_stats = self.document_repo.get_filing_statistics()
@@ -541,23 +747,37 @@ class DocumentStorageService:
             Number of files cleaned up
         """
         try:
-            cleaned_count = 0
-            
-            for file_path in self.storage_path.rglob('*'):
-                if file_path.is_file():
-                    # Check if file has corresponding database record
-                    relative_path = str(file_path.relative_to(self.storage_path))
-                    
-                    # Query database for document with this file path
-                    document = self.db.query(Document).filter(
-                        Document.file_path.like(f"%{relative_path}")
-                    ).first()
-                    
-                    if not document:
-                        # File is orphaned, remove it
-                        file_path.unlink()
-                        cleaned_count += 1
-                        logger.debug(f"Removed orphaned file: {file_path}")
+            # Load every known file path in one query instead of one per file.
+            # Stored paths may be relative to a different working directory or
+            # an old storage root, so a file is known if its path relative to
+            # storage_path is a trailing part of any stored path.
+            known_suffixes = set()
+            for (stored_path,) in self.db.execute(
+                select(Document.file_path).where(Document.file_path.isnot(None))
+            ):
+                parts = Path(stored_path).parts
+                known_suffixes.update(parts[i:] for i in range(len(parts)))
+            
+            orphaned_paths = [
+                entry.path for entry in _scan_files(self.storage_path)
+                if Path(entry.path).relative_to(self.storage_path).parts not in known_suffixes
+            ]
+            
+            # Remove orphans off the event loop, bounded to avoid exhausting the thread pool
+            semaphore = asyncio.Semaphore(MAX_CONCURRENT_UNLINKS)
+            
+            async def remove_file(path: str) -> bool:
+                async with semaphore:
+                    try:
+                        await asyncio.to_thread(os.unlink, path)
+                        logger.debug(f"Removed orphaned file: {path}")
+                        return True
+                    except OSError as e:
+                        logger.warning(f"Failed to remove orphaned file {path}: {e}")
+                        return False
+            
+            results = await asyncio.gather(*(remove_file(path) for path in orphaned_paths))
+            cleaned_count = sum(results)
             
             logger.info(f"Cleaned up {cleaned_count} orphaned files")
             return cleaned_count
@@ -12,8 +12,9 @@ from enum import Enum
 import json
 import time
 
+from app.database import SessionLocal
 from app.services.document_storage import DocumentStorageService
-from app.services.sec_edgar_scraper import SECEdgarScraper
+from app.services.sec_edgar_scraper import RateLimiter, SECEdgarScraper
 from app.repositories.manager import RepositoryManager
 from app.config import settings
 
@@ -88,6 +89,9 @@ class ProcessingService:
         # Processing configuration
         self.supported_filing_types = ["10-K", "10-Q", "8-K", "20-F", "4"]
         
+        # One SEC request limiter for all jobs, so concurrent jobs share the cap
+        self._sec_rate_limiter = RateLimiter(requests_per_second=9.0)
+        
     async def start_processing(self, 
                              ticker: str, 
                              time_range: int,
@@ -248,13 +252,12 @@ class ProcessingService:
                 await self._update_progress(status, phase, progress, total)
             
             # Get database session (using sync session for now)
-            from app.database import SessionLocal
-            
             with SessionLocal() as db:
                 # Initialize document storage service
                 storage_service = DocumentStorageService(
                     db=db,
-                    storage_path=settings.document_storage_path
+                    storage_path=settings.document_storage_path,
+                    rate_limiter=self._sec_rate_limiter
                 )
                 
                 async with storage_service:
@@ -355,9 +358,6 @@ def get_processing_service() -> ProcessingService:
     global _processing_service
     
     if _processing_service is None:
-        from app.database import SessionLocal
-        from app.repositories.manager import RepositoryManager
-        
         # Create a dummy repository manager for now
         # In production, this would be properly dependency injected
         db = SessionLocal()
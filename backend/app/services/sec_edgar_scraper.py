@@ -44,17 +44,21 @@ class RateLimiter:
         self.requests_per_second = requests_per_second
         self.min_interval = 1.0 / requests_per_second
         self.last_request_time = 0.0
+        self._lock = asyncio.Lock()
     
     async def wait(self):
         """Wait if necessary to respect rate limits"""
-        current_time = time.time()
-        time_since_last = current_time - self.last_request_time
-        
-        if time_since_last < self.min_interval:
-            wait_time = self.min_interval - time_since_last
-            await asyncio.sleep(wait_time)
-        
-        self.last_request_time = time.time()
+        # Serialize waiters so concurrent callers are spaced out instead of
+        # all reading the same last_request_time and firing together
+        async with self._lock:
+            current_time = time.time()
+            time_since_last = current_time - self.last_request_time
+            
+            if time_since_last < self.min_interval:
+                wait_time = self.min_interval - time_since_last
+                await asyncio.sleep(wait_time)
+            
+            self.last_request_time = time.time()
 
 
 class SECEdgarScraper:
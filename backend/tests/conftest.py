@@ -2,8 +2,15 @@
 Test configuration and fixtures for database integration tests.
 """
 
+import dataclasses
+import logging
+import uuid
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Dict, Optional
+
 import pytest
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event, insert
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.pool import StaticPool
 from fastapi.testclient import TestClient
@@ -16,43 +23,94 @@ from app.models.database import Company, Document, DocumentChunk
 from app.repositories import RepositoryManager
 
 
-# Test database URL (SQLite in-memory for fast tests)
-TEST_DATABASE_URL = "sqlite:///:memory:"
+# Keep SQLAlchemy from building log records for every test query
+logging.getLogger("sqlalchemy").setLevel(logging.WARNING)
+
+# Test database URL (SQLite in-memory for fast tests), named per pytest-xdist worker
+TEST_DATABASE_URL = "sqlite:///file:memdb_{worker_id}?mode=memory&cache=shared&uri=true"
+
+
+# Per-test time budget (seconds) for the modules most sensitive to fixture overhead
+SLOW_TEST_BUDGET = 0.5
+_BUDGETED_MODULES = ("tests/test_processing_service.py", "tests/test_repositories.py")
+_slow_tests = []
+
+
+def pytest_runtest_logreport(report):
+    """Record budgeted tests whose call phase ran over SLOW_TEST_BUDGET."""
+    if (report.when == "call" and report.duration > SLOW_TEST_BUDGET
+            and report.nodeid.startswith(_BUDGETED_MODULES)):
+        _slow_tests.append((report.nodeid, report.duration))
+
+
+def pytest_terminal_summary(terminalreporter):
+    """Warn about tests that exceeded the per-test time budget."""
+    if not _slow_tests:
+        return
+    terminalreporter.section(f"tests over {SLOW_TEST_BUDGET}s budget", yellow=True)
+    for nodeid, duration in sorted(_slow_tests, key=lambda item: item[1], reverse=True):
+        terminalreporter.write_line(f"WARNING {duration:.2f}s {nodeid}", yellow=True)
+
+
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    """Enforce foreign keys and enable WAL once per new SQLite connection."""
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA foreign_keys=ON")
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.close()
+    # Let SQLAlchemy emit BEGIN itself so SAVEPOINTs work with pysqlite
+    dbapi_connection.isolation_level = None
+
+
+def _begin_sqlite_transaction(connection):
+    """Emit an explicit BEGIN, which pysqlite skips when isolation_level is None."""
+    connection.exec_driver_sql("BEGIN")
 
 
 @pytest.fixture(scope="session")
-def test_engine():
-    """Create test database engine."""
+def test_engine(request):
+    """Create test database engine with the schema created once per worker."""
+    worker_id = getattr(request.config, "workerinput", {}).get("workerid", "master")
     engine = create_engine(
-        TEST_DATABASE_URL,
+        TEST_DATABASE_URL.format(worker_id=worker_id),
         connect_args={"check_same_thread": False},
         poolclass=StaticPool,
         echo=False
     )
+    event.listen(engine, "connect", _set_sqlite_pragmas)
+    event.listen(engine, "begin", _begin_sqlite_transaction)
+    Base.metadata.create_all(bind=engine)
     return engine
 
 
 @pytest.fixture(scope="session")
 def test_session_factory(test_engine):
     """Create test session factory."""
-    return sessionmaker(autocommit=False, autoflush=False, bind=test_engine)
+    return sessionmaker(autocommit=False, autoflush=False, expire_on_commit=False, bind=test_engine)
 
 
 @pytest.fixture(scope="function")
 def test_db(test_engine, test_session_factory):
-    """Create test database session for each test."""
-    # Create all tables
-    Base.metadata.create_all(bind=test_engine)
+    """
+    Create test database session for each test.
     
-    # Create session
-    session = test_session_factory()
+    The session is joined to an outer transaction that is rolled back after
+    the test; commits and rollbacks inside the test only release or roll back
+    SAVEPOINTs, so no tables need to be dropped and recreated.
+    """
+    connection = test_engine.connect()
+    transaction = connection.begin()
+    session = test_session_factory(
+        bind=connection,
+        join_transaction_mode="create_savepoint"
+    )
     
     try:
         yield session
     finally:
         session.close()
-        # Drop all tables after test
-        Base.metadata.drop_all(bind=test_engine)
+        transaction.rollback()
+        connection.close()
 
 
 @pytest.fixture(scope="function")
@@ -79,67 +137,145 @@ def repo_manager(test_db):
     return RepositoryManager(test_db)
 
 
-@pytest.fixture(scope="function")
-def sample_company_data():
+class _Row:
+    """Helpers shared by the slotted sample row builders."""
+    
+    __slots__ = ()
+    
+    def replace(self, **changes: Any):
+        """Return a copy of this row with the given fields changed."""
+        return dataclasses.replace(self, **changes)
+    
+    def as_dict(self) -> Dict[str, Any]:
+        """Return the row as keyword arguments for a model or repository."""
+        return dataclasses.asdict(self)
+
+
+@dataclass(slots=True)
+class CompanyRow(_Row):
+    """Sample company column values."""
+    ticker: str = "AAPL"
+    name: str = "Apple Inc."
+    cik_str: int = 320193
+    exchange: str = "NASDAQ"
+    sector: str = "Technology"
+    industry: str = "Consumer Electronics"
+    market_cap: float = 3000000000000.0
+
+
+@dataclass(slots=True)
+class DocumentRow(_Row):
+    """Sample document column values."""
+    ticker: str = "AAPL"
+    filing_type: str = "10-K"
+    accession_number: str = "0000320193-23-000006"
+    period_end: str = "2023-09-30T00:00:00"
+    filed_date: str = "2023-11-03T00:00:00"
+    document_url: str = "https://www.sec.gov/Archives/edgar/data/320193/000032019323000006/aapl-20230930.htm"
+    document_format: str = "HTML"
+    processing_status: str = "pending"
+
+
+@dataclass(slots=True)
+class ChunkRow(_Row):
+    """Sample document chunk column values."""
+    content: str = "Apple Inc. reported revenue of $383.3 billion for fiscal year 2023."
+    content_hash: str = "abc123def456"
+    section: str = "Financial Statements"
+    subsection: str = "Income Statement"
+    page_number: int = 45
+    chunk_index: int = 1
+    word_count: int = 12
+    character_count: int = 67
+    confidence_score: float = 0.95
+    is_financial_data: bool = True
+    is_table: bool = False
+    document_id: Optional[str] = None
+    pinecone_id: Optional[str] = None
+
+
+@pytest.fixture(scope="module")
+def sample_company_row():
+    """Sample company row builder for tests."""
+    return CompanyRow()
+
+
+@pytest.fixture(scope="module")
+def sample_document_row():
+    """Sample document row builder for tests."""
+    return DocumentRow()
+
+
+@pytest.fixture(scope="module")
+def sample_chunk_row():
+    """Sample document chunk row builder for tests."""
+    return ChunkRow()
+
+
+@pytest.fixture(scope="module")
+def sample_company_data(sample_company_row):
     """Sample company data for tests."""
-    return {
-        "ticker": "AAPL",
-        "name": "Apple Inc.",
-        "cik_str": 320193,
-        "exchange": "NASDAQ",
-        "sector": "Technology",
-        "industry": "Consumer Electronics",
-        "market_cap": 3000000000000.0
-    }
+    return sample_company_row.as_dict()
 
 
-@pytest.fixture(scope="function")
-def sample_document_data():
+@pytest.fixture(scope="module")
+def sample_document_data(sample_document_row):
     """Sample document data for tests."""
-    return {
-        "ticker": "AAPL",
-        "filing_type": "10-K",
-        "accession_number": "0000320193-23-000006",
-        "period_end": "2023-09-30T00:00:00",
-        "filed_date": "2023-11-03T00:00:00",
-        "document_url": "https://www.sec.gov/Archives/edgar/data/320193/000032019323000006/aapl-20230930.htm",
-        "document_format": "HTML",
-        "processing_status": "pending"
-    }
+    return sample_document_row.as_dict()
 
 
-@pytest.fixture(scope="function")
-def sample_chunk_data():
+@pytest.fixture(scope="module")
+def sample_chunk_data(sample_chunk_row):
     """Sample document chunk data for tests."""
+    return sample_chunk_row.as_dict()
+
+
+@pytest.fixture(scope="class")
+def seed_rows(sample_company_row, sample_document_row, sample_chunk_row):
+    """
+    Insert-ready company, document and chunk rows shared by a test class.
+    
+    Document dates are parsed once here and the document id is fixed up front,
+    so the chunk row can reference it without waiting for an INSERT.
+    """
+    document_id = str(uuid.uuid4())
+    document = sample_document_row.as_dict()
+    document.update(
+        id=document_id,
+        period_end=datetime.fromisoformat(document["period_end"]),
+        filed_date=datetime.fromisoformat(document["filed_date"]),
+    )
+    chunk = sample_chunk_row.replace(document_id=document_id).as_dict()
     return {
-        "content": "Apple Inc. reported revenue of $383.3 billion for fiscal year 2023.",
-        "content_hash": "abc123def456",
-        "section": "Financial Statements",
-        "subsection": "Income Statement",
-        "page_number": 45,
-        "chunk_index": 1,
-        "word_count": 12,
-        "character_count": 67,
-        "confidence_score": 0.95,
-        "is_financial_data": True,
-        "is_table": False
+        Company: sample_company_row.as_dict(),
+        Document: document,
+        DocumentChunk: chunk,
     }
 
 
+def _seed(session, model, row, pk):
+    """Insert a seed row with one Core INSERT and load it by primary key."""
+    session.execute(insert(model), [row])
+    session.commit()
+    return session.get(model, pk)
+
+
 @pytest.fixture(scope="function")
-def created_company(repo_manager, sample_company_data):
+def created_company(test_db, seed_rows):
     """Create a company in the test database."""
-    return repo_manager.company.create(sample_company_data)
+    row = seed_rows[Company]
+    return _seed(test_db, Company, row, row["ticker"])
 
 
 @pytest.fixture(scope="function")
-def created_document(repo_manager, created_company, sample_document_data):
+def created_document(test_db, created_company, seed_rows):
     """Create a document in the test database."""
-    return repo_manager.document.create(sample_document_data)
+    row = seed_rows[Document]
+    return _seed(test_db, Document, row, row["id"])
 
 
 @pytest.fixture(scope="function")
-def created_chunk(repo_manager, created_document, sample_chunk_data):
+def created_chunk(test_db, created_document, seed_rows):
     """Create a document chunk in the test database."""
-    sample_chunk_data["document_id"] = created_document.id
-    return repo_manager.document_chunk.create(sample_chunk_data)
\ No newline at end of file
+    row = dict(seed_rows[DocumentChunk], id=str(uuid.uuid4()))
+    return _seed(test_db, DocumentChunk, row, row["id"])
@@ -3,21 +3,43 @@ Integration tests for database operations and performance.
 """
 
 import pytest
-from datetime import datetime, timedelta
-from sqlalchemy import text
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import event, text
+from sqlalchemy.exc import IntegrityError
+import statistics
 import time
 
 from app.database import check_database_connection, get_database_health
 from app.repositories import RepositoryManager
 
 
+# Performance budgets are expressed as multiples of a trivial SELECT 1 round-trip
+PERF_BUDGET_FACTOR = 5000
+
+# Statements reused across tests so their compiled form is cached once
+SELECT_ONE = text("SELECT 1")
+SELECT_TEST_VALUE = text("SELECT 1 as test_value")
+
+
+@pytest.fixture(scope="module")
+def baseline_ns(test_engine):
+    """Median duration of a SELECT 1 round-trip in nanoseconds."""
+    samples = []
+    with test_engine.connect() as connection:
+        for _ in range(100):
+            start_ns = time.perf_counter_ns()
+            connection.execute(SELECT_ONE).scalar()
+            samples.append(time.perf_counter_ns() - start_ns)
+    return statistics.median(samples)
+
+
 class TestDatabaseConnection:
     """Test database connection and health checks."""
     
     def test_database_connection(self, test_db):
         """Test basic database connection."""
         # Execute a simple query
-        result = test_db.execute(text("SELECT 1 as test_value"))
+        result = test_db.execute(SELECT_TEST_VALUE)
         row = result.fetchone()
         
         assert row is not None
@@ -66,7 +88,7 @@ class TestDatabaseConnection:
 class TestDatabasePerformance:
     """Test database query performance and optimization."""
     
-    def test_company_search_performance(self, repo_manager):
+    def test_company_search_performance(self, repo_manager, baseline_ns):
         """Test company search query performance."""
         # Create multiple companies for testing
         companies_data = []
@@ -80,19 +102,17 @@ class TestDatabasePerformance:
             })
         
         # Bulk create companies
-        repo_manager.company.bulk_create(companies_data)
+        repo_manager.company.bulk_core_insert(companies_data)
         
         # Test search performance
-        start_time = time.time()
+        start_ns = time.perf_counter_ns()
         results = repo_manager.company.search_by_name("Test")
-        end_time = time.time()
-        
-        query_time = end_time - start_time
+        elapsed_ns = time.perf_counter_ns() - start_ns
         
         assert len(results) > 0
-        assert query_time < 1.0  # Should complete within 1 second
+        assert elapsed_ns < baseline_ns * PERF_BUDGET_FACTOR
     
-    def test_document_retrieval_performance(self, repo_manager, test_db):
+    def test_document_retrieval_performance(self, repo_manager, test_db, baseline_ns):
         """Test document retrieval performance."""
         # Create a company
         company_data = {
@@ -103,29 +123,29 @@ class TestDatabasePerformance:
         repo_manager.company.create(company_data)
         
         # Create multiple documents
-        documents_data = []
-        for i in range(50):
-            documents_data.append({
+        now = datetime.now(timezone.utc)
+        documents_data = [
+            {
                 "ticker": "PERF",
                 "filing_type": "10-K" if i % 5 == 0 else "10-Q",
                 "accession_number": f"0000999999-23-{i:06d}",
-                "filed_date": datetime.utcnow() - timedelta(days=i),
+                "filed_date": now - timedelta(days=i),
                 "processing_status": "completed"
-            })
+            }
+            for i in range(50)
+        ]
         
-        repo_manager.document.bulk_create(documents_data)
+        repo_manager.document.bulk_core_insert(documents_data)
         
         # Test retrieval performance
-        start_time = time.time()
+        start_ns = time.perf_counter_ns()
         documents = repo_manager.document.get_by_ticker("PERF")
-        end_time = time.time()
-        
-        query_time = end_time - start_time
+        elapsed_ns = time.perf_counter_ns() - start_ns
         
         assert len(documents) == 50
-        assert query_time < 0.5  # Should complete within 0.5 seconds
+        assert elapsed_ns < baseline_ns * PERF_BUDGET_FACTOR
     
-    def test_chunk_search_performance(self, repo_manager, test_db):
+    def test_chunk_search_performance(self, repo_manager, test_db, baseline_ns):
         """Test document chunk search performance."""
         # Create company and document
         company_data = {
@@ -139,7 +159,7 @@ class TestDatabasePerformance:
             "ticker": "CHUNK",
             "filing_type": "10-K",
             "accession_number": "0000888888-23-000001",
-            "filed_date": datetime.utcnow(),
+            "filed_date": datetime.now(timezone.utc),
             "processing_status": "completed"
         }
         document = repo_manager.document.create(document_data)
@@ -158,17 +178,15 @@ class TestDatabasePerformance:
                 "is_financial_data": i % 3 == 0
             })
         
-        repo_manager.document_chunk.bulk_create(chunks_data)
+        repo_manager.document_chunk.bulk_core_insert(chunks_data)
         
         # Test search performance
-        start_time = time.time()
+        start_ns = time.perf_counter_ns()
         chunks = repo_manager.document_chunk.search_chunks_by_content("revenue")
-        end_time = time.time()
-        
-        query_time = end_time - start_time
+        elapsed_ns = time.perf_counter_ns() - start_ns
         
         assert len(chunks) > 0
-        assert query_time < 1.0  # Should complete within 1 second
+        assert elapsed_ns < baseline_ns * PERF_BUDGET_FACTOR
 
 
 class TestComplexQueries:
@@ -185,33 +203,57 @@ class TestComplexQueries:
         }
         company = repo_manager.company.create(company_data)
         
-        document_data = {
-            "ticker": "COMPLEX",
-            "filing_type": "10-K",
-            "accession_number": "0000777777-23-000001",
-            "filed_date": datetime.utcnow(),
-            "processing_status": "completed"
-        }
-        document = repo_manager.document.create(document_data)
-        
-        chunk_data = {
-            "document_id": document.id,
-            "content": "Revenue increased by 15% year over year.",
-            "section": "Financial Performance",
-            "chunk_index": 1,
-            "word_count": 8,
-            "character_count": 40,
-            "confidence_score": 0.95,
-            "is_financial_data": True
-        }
-        chunk = repo_manager.document_chunk.create(chunk_data)
-        
-        # Test complex query: Get financial chunks for companies in Technology sector
-        financial_chunks = repo_manager.document_chunk.get_financial_data_chunks(ticker="COMPLEX")
+        # Two documents with two financial chunks each, so per-chunk lazy loads would show up
+        documents = repo_manager.document.bulk_create([
+            {
+                "ticker": "COMPLEX",
+                "filing_type": "10-K",
+                "accession_number": f"0000777777-23-00000{i}",
+                "filed_date": datetime.now(timezone.utc),
+                "processing_status": "completed"
+            }
+            for i in range(1, 3)
+        ])
         
-        assert len(financial_chunks) == 1
-        assert financial_chunks[0].is_financial_data is True
-        assert financial_chunks[0].document.company.sector == "Technology"
+        repo_manager.document_chunk.bulk_core_insert([
+            {
+                "document_id": document.id,
+                "content": "Revenue increased by 15% year over year.",
+                "section": "Financial Performance",
+                "chunk_index": i,
+                "word_count": 8,
+                "character_count": 40,
+                "confidence_score": 0.95,
+                "is_financial_data": True
+            }
+            for document in documents
+            for i in range(2)
+        ])
+        
+        # Drop cached instances so relationship loads have to reach the database
+        test_db.expunge_all()
+        
+        # Count SELECTs issued while loading chunks and walking to the company
+        statements = []
+        
+        def count_statement(conn, cursor, statement, parameters, context, executemany):
+            if statement.lstrip().upper().startswith("SELECT"):
+                statements.append(statement)
+        
+        engine = test_db.get_bind()
+        event.listen(engine, "before_cursor_execute", count_statement)
+        try:
+            # Test complex query: Get financial chunks for companies in Technology sector
+            financial_chunks = repo_manager.document_chunk.get_financial_data_chunks(ticker="COMPLEX")
+            
+            assert len(financial_chunks) == 4
+            assert all(chunk.is_financial_data is True for chunk in financial_chunks)
+            assert {chunk.document.company.sector for chunk in financial_chunks} == {"Technology"}
+        finally:
+            event.remove(engine, "before_cursor_execute", count_statement)
+        
+        # Chunks, documents and companies are each fetched once
+        assert len(statements) == 3
     
     def test_aggregation_queries(self, repo_manager, test_db):
         """Test aggregation and statistical queries."""
@@ -232,16 +274,16 @@ class TestComplexQueries:
         assert len(sector_stats) == 2
         
         # Find Technology sector stats
-        tech_stats = next((s for s in sector_stats if s["sector"] == "Technology"), None)
-        assert tech_stats is not None
+        tech_stats = sector_stats["Technology"]
         assert tech_stats["company_count"] == 2
         assert tech_stats["total_market_cap"] == 3000000000
+        assert tech_stats["avg_market_cap"] == 1500000000
         
         # Find Finance sector stats
-        finance_stats = next((s for s in sector_stats if s["sector"] == "Finance"), None)
-        assert finance_stats is not None
+        finance_stats = sector_stats["Finance"]
         assert finance_stats["company_count"] == 2
         assert finance_stats["total_market_cap"] == 2000000000
+        assert finance_stats["avg_market_cap"] == 1000000000
     
     def test_document_statistics(self, repo_manager, test_db):
         """Test document processing statistics."""
@@ -254,11 +296,12 @@ class TestComplexQueries:
         repo_manager.company.create(company_data)
         
         # Create documents with different statuses
+        now = datetime.now(timezone.utc)
         documents_data = [
-            {"ticker": "STATS", "filing_type": "10-K", "accession_number": "0000666666-23-000001", "filed_date": datetime.utcnow(), "processing_status": "completed"},
-            {"ticker": "STATS", "filing_type": "10-Q", "accession_number": "0000666666-23-000002", "filed_date": datetime.utcnow(), "processing_status": "completed"},
-            {"ticker": "STATS", "filing_type": "8-K", "accession_number": "0000666666-23-000003", "filed_date": datetime.utcnow(), "processing_status": "pending"},
-            {"ticker": "STATS", "filing_type": "10-Q", "accession_number": "0000666666-23-000004", "filed_date": datetime.utcnow(), "processing_status": "failed"}
+            {"ticker": "STATS", "filing_type": "10-K", "accession_number": "0000666666-23-000001", "filed_date": now, "processing_status": "completed"},
+            {"ticker": "STATS", "filing_type": "10-Q", "accession_number": "0000666666-23-000002", "filed_date": now, "processing_status": "completed"},
+            {"ticker": "STATS", "filing_type": "8-K", "accession_number": "0000666666-23-000003", "filed_date": now, "processing_status": "pending"},
+            {"ticker": "STATS", "filing_type": "10-Q", "accession_number": "0000666666-23-000004", "filed_date": now, "processing_status": "failed"}
         ]
         
         for doc_data in documents_data:
@@ -284,25 +327,17 @@ class TestDataIntegrity:
     
     def test_foreign_key_constraints(self, repo_manager, test_db):
         """Test foreign key constraint enforcement."""
-        # Try to create document without company (should fail in real PostgreSQL)
+        # Try to create document without company
         document_data = {
             "ticker": "NONEXISTENT",
             "filing_type": "10-K",
             "accession_number": "0000000000-23-000001",
-            "filed_date": datetime.utcnow(),
+            "filed_date": datetime.now(timezone.utc),
             "processing_status": "pending"
         }
         
-        # In SQLite with foreign keys enabled, this would fail
-        # For this test, we'll just verify the logic works
-        try:
-            document = repo_manager.document.create(document_data)
-            # If creation succeeds, verify we can't find the company
-            company = repo_manager.company.get_by_ticker("NONEXISTENT")
-            assert company is None
-        except Exception:
-            # Expected behavior with proper foreign key constraints
-            pass
+        with pytest.raises(IntegrityError):
+            repo_manager.document.create(document_data)
     
     def test_cascade_delete_behavior(self, repo_manager, created_company, created_document, created_chunk):
         """Test cascade delete behavior."""
@@ -320,20 +355,18 @@ class TestDataIntegrity:
         # But we can test the repository delete methods
         assert deleted_document is None or deleted_document.id != document_id
     
-    def test_unique_constraint_enforcement(self, repo_manager, sample_company_data):
+    def test_unique_constraint_enforcement(self, repo_manager, sample_company_data, sample_company_row):
         """Test unique constraint enforcement."""
         # Create first company
         company1 = repo_manager.company.create(sample_company_data)
         assert company1.ticker == "AAPL"
         
         # Try to create duplicate ticker
-        with pytest.raises(Exception):  # Should raise IntegrityError or similar
+        with pytest.raises(IntegrityError):
             repo_manager.company.create(sample_company_data)
         
         # Try to create duplicate CIK
-        duplicate_cik_data = sample_company_data.copy()
-        duplicate_cik_data["ticker"] = "AAPL2"
-        duplicate_cik_data["name"] = "Apple Inc. Duplicate"
+        duplicate_cik_data = sample_company_row.replace(ticker="AAPL2", name="Apple Inc. Duplicate").as_dict()
         
-        with pytest.raises(Exception):  # Should raise IntegrityError or similar
+        with pytest.raises(IntegrityError):
             repo_manager.company.create(duplicate_cik_data)
\ No newline at end of file
@@ -3,7 +3,7 @@ Tests for SQLAlchemy database models and relationships.
 """
 
 import pytest
-from datetime import datetime
+from datetime import datetime, timezone
 from sqlalchemy.exc import IntegrityError
 
 from app.models.database import Company, Document, DocumentChunk, QueryLog
@@ -34,12 +34,14 @@ class TestCompanyModel:
         
         # Try to create duplicate ticker
         company2 = Company(**sample_company_data)
-        test_db.add(company2)
         
-        with pytest.raises(IntegrityError):
-            test_db.commit()
+        # Only the savepoint is rolled back; the outer transaction stays usable
+        with pytest.raises(IntegrityError), test_db.begin_nested():
+            test_db.add(company2)
+        
+        assert test_db.query(Company).count() == 1
     
-    def test_company_cik_unique(self, test_db, sample_company_data):
+    def test_company_cik_unique(self, test_db, sample_company_data, sample_company_row):
         """Test CIK uniqueness constraint."""
         # Create first company
         company1 = Company(**sample_company_data)
@@ -47,15 +49,15 @@ class TestCompanyModel:
         test_db.commit()
         
         # Try to create company with same CIK but different ticker
-        duplicate_cik_data = sample_company_data.copy()
-        duplicate_cik_data["ticker"] = "MSFT"
-        duplicate_cik_data["name"] = "Microsoft Corporation"
+        duplicate_cik_data = sample_company_row.replace(ticker="MSFT", name="Microsoft Corporation").as_dict()
         
         company2 = Company(**duplicate_cik_data)
-        test_db.add(company2)
         
-        with pytest.raises(IntegrityError):
-            test_db.commit()
+        # Only the savepoint is rolled back; the outer transaction stays usable
+        with pytest.raises(IntegrityError), test_db.begin_nested():
+            test_db.add(company2)
+        
+        assert test_db.query(Company).count() == 1
     
     def test_company_repr(self, test_db, sample_company_data):
         """Test company string representation."""
@@ -97,7 +99,7 @@ class TestDocumentModel:
         assert len(created_company.documents) == 1
         assert created_company.documents[0].id == document.id
     
-    def test_document_accession_unique(self, test_db, created_company, sample_document_data):
+    def test_document_accession_unique(self, test_db, created_company, sample_document_data, sample_document_row):
         """Test accession number uniqueness."""
         # Create first document
         document1 = Document(**sample_document_data)
@@ -105,14 +107,13 @@ class TestDocumentModel:
         test_db.commit()
         
         # Try to create duplicate accession number
-        duplicate_data = sample_document_data.copy()
-        duplicate_data["filing_type"] = "10-Q"
+        duplicate_data = sample_document_row.replace(filing_type="10-Q").as_dict()
         
         document2 = Document(**duplicate_data)
-        test_db.add(document2)
         
-        with pytest.raises(IntegrityError):
-            test_db.commit()
+        # Only the savepoint is rolled back; the outer transaction stays usable
+        with pytest.raises(IntegrityError), test_db.begin_nested():
+            test_db.add(document2)
     
     def test_document_cascade_delete(self, test_db, created_company, sample_document_data):
         """Test cascade delete when company is deleted."""
@@ -136,8 +137,8 @@ class TestDocumentChunkModel:
     
     def test_create_chunk(self, test_db, created_document, sample_chunk_data):
         """Test creating a document chunk."""
-        sample_chunk_data["document_id"] = created_document.id
-        chunk = DocumentChunk(**sample_chunk_data)
+        chunk_data = dict(sample_chunk_data, document_id=created_document.id)
+        chunk = DocumentChunk(**chunk_data)
         test_db.add(chunk)
         test_db.commit()
         
@@ -150,8 +151,8 @@ class TestDocumentChunkModel:
     
     def test_chunk_document_relationship(self, test_db, created_document, sample_chunk_data):
         """Test chunk-document relationship."""
-        sample_chunk_data["document_id"] = created_document.id
-        chunk = DocumentChunk(**sample_chunk_data)
+        chunk_data = dict(sample_chunk_data, document_id=created_document.id)
+        chunk = DocumentChunk(**chunk_data)
         test_db.add(chunk)
         test_db.commit()
         
@@ -164,31 +165,28 @@ class TestDocumentChunkModel:
         assert len(created_document.chunks) == 1
         assert created_document.chunks[0].id == chunk.id
     
-    def test_chunk_pinecone_id_unique(self, test_db, created_document, sample_chunk_data):
+    def test_chunk_pinecone_id_unique(self, test_db, created_document, sample_chunk_row):
         """Test Pinecone ID uniqueness."""
-        sample_chunk_data["document_id"] = created_document.id
-        sample_chunk_data["pinecone_id"] = "unique-vector-id-123"
+        chunk_row = sample_chunk_row.replace(document_id=created_document.id, pinecone_id="unique-vector-id-123")
         
         # Create first chunk
-        chunk1 = DocumentChunk(**sample_chunk_data)
+        chunk1 = DocumentChunk(**chunk_row.as_dict())
         test_db.add(chunk1)
         test_db.commit()
         
         # Try to create duplicate Pinecone ID
-        duplicate_data = sample_chunk_data.copy()
-        duplicate_data["chunk_index"] = 2
-        duplicate_data["content"] = "Different content"
+        duplicate_data = chunk_row.replace(chunk_index=2, content="Different content").as_dict()
         
         chunk2 = DocumentChunk(**duplicate_data)
-        test_db.add(chunk2)
         
-        with pytest.raises(IntegrityError):
-            test_db.commit()
+        # Only the savepoint is rolled back; the outer transaction stays usable
+        with pytest.raises(IntegrityError), test_db.begin_nested():
+            test_db.add(chunk2)
     
     def test_chunk_cascade_delete(self, test_db, created_document, sample_chunk_data):
         """Test cascade delete when document is deleted."""
-        sample_chunk_data["document_id"] = created_document.id
-        chunk = DocumentChunk(**sample_chunk_data)
+        chunk_data = dict(sample_chunk_data, document_id=created_document.id)
+        chunk = DocumentChunk(**chunk_data)
         test_db.add(chunk)
         test_db.commit()
         
@@ -247,8 +245,8 @@ class TestModelRelationships:
         test_db.commit()
         
         # Create chunk
-        sample_chunk_data["document_id"] = document.id
-        chunk = DocumentChunk(**sample_chunk_data)
+        chunk_data = dict(sample_chunk_data, document_id=document.id)
+        chunk = DocumentChunk(**chunk_data)
         test_db.add(chunk)
         test_db.commit()
         
@@ -259,11 +257,12 @@ class TestModelRelationships:
     def test_multiple_documents_per_company(self, test_db, created_company):
         """Test multiple documents for one company."""
         # Create multiple documents
+        now = datetime.now(timezone.utc)
         doc_data_1 = {
             "ticker": "AAPL",
             "filing_type": "10-K",
             "accession_number": "0000320193-23-000006",
-            "filed_date": datetime.utcnow(),
+            "filed_date": now,
             "processing_status": "completed"
         }
         
@@ -271,14 +270,11 @@ class TestModelRelationships:
             "ticker": "AAPL", 
             "filing_type": "10-Q",
             "accession_number": "0000320193-23-000007",
-            "filed_date": datetime.utcnow(),
+            "filed_date": now,
             "processing_status": "pending"
         }
         
-        doc1 = Document(**doc_data_1)
-        doc2 = Document(**doc_data_2)
-        
-        test_db.add_all([doc1, doc2])
+        test_db.bulk_insert_mappings(Document, [doc_data_1, doc_data_2])
         test_db.commit()
         
         # Test relationship
@@ -310,10 +306,7 @@ class TestModelRelationships:
             "confidence_score": 0.85
         }
         
-        chunk1 = DocumentChunk(**chunk_data_1)
-        chunk2 = DocumentChunk(**chunk_data_2)
-        
-        test_db.add_all([chunk1, chunk2])
+        test_db.bulk_insert_mappings(DocumentChunk, [chunk_data_1, chunk_data_2])
         test_db.commit()
         
         # Test relationship
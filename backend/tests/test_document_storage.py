@@ -4,20 +4,43 @@ Tests for document storage service.
 
 import pytest
 import asyncio
+import io
+import os
 import tempfile
 import shutil
 from pathlib import Path
+from types import SimpleNamespace
 from datetime import datetime
-from unittest.mock import AsyncMock, MagicMock, patch
+from unittest.mock import AsyncMock, MagicMock, create_autospec, patch
+import aiofiles
 import httpx
+from sqlalchemy.exc import SQLAlchemyError
 
-from app.services.document_storage import DocumentStorageService
-from app.services.sec_edgar_scraper import Filing
+from app.services.document_storage import DocumentStorageService, OPENSSL_SHA256, WRITE_BLOCK_SIZE
+from app.services.sec_edgar_scraper import Filing, RateLimiter
 from app.models.database import Document, Company
 from app.repositories.document import DocumentRepository
 from app.repositories.company import CompanyRepository
 
 
+# Filing dates for the multi-filing tests, built once
+BASE_DATES = [datetime(2023, 1, 1), datetime(2023, 1, 2), datetime(2023, 1, 3)]
+
+
+def _make_filing(i: int, ticker: str = "TEST", company_name: str = "Test Company") -> Filing:
+    """Build the i-th test filing"""
+    return Filing(
+        accession_number=f"test-{i}",
+        filing_type="10-K",
+        filing_date=BASE_DATES[i],
+        period_end=None,
+        document_url=f"https://example.com/doc{i}.html",
+        ticker=ticker,
+        company_name=company_name,
+        cik="0000123456"
+    )
+
+
 @pytest.fixture
 def temp_storage_dir():
     """Create temporary storage directory for tests"""
@@ -26,6 +49,12 @@ def temp_storage_dir():
     shutil.rmtree(temp_dir)
 
 
+@pytest.fixture(scope="session")
+def ro_storage_dir(tmp_path_factory):
+    """Create storage directory shared by tests that don't inspect its contents"""
+    return str(tmp_path_factory.mktemp("storage_ro"))
+
+
 @pytest.fixture
 def sample_filing():
     """Create sample filing for tests"""
@@ -45,32 +74,82 @@ def sample_filing():
 
 @pytest.fixture
 def mock_db_session():
-    """Create mock database session"""
-    return MagicMock()
+    """Create mock database session with only the methods the service uses"""
+    return SimpleNamespace(
+        query=MagicMock(),
+        execute=MagicMock(),
+        commit=MagicMock(),
+        rollback=MagicMock(),
+        bulk_save_objects=MagicMock()
+    )
 
 
 @pytest.fixture
-def document_storage_service(mock_db_session, temp_storage_dir):
+async def document_storage_service(mock_db_session, ro_storage_dir):
     """Create document storage service with mocked dependencies"""
-    return DocumentStorageService(
+    service = DocumentStorageService(
+        db=mock_db_session,
+        storage_path=ro_storage_dir,
+        max_concurrent_downloads=2,
+        retry_attempts=2,
+        retry_delay=0.1
+    )
+    yield service
+    await service.close()
+
+
+@pytest.fixture
+async def writable_storage_service(mock_db_session, temp_storage_dir):
+    """Create document storage service over a private directory for tests that scan it"""
+    service = DocumentStorageService(
         db=mock_db_session,
         storage_path=temp_storage_dir,
         max_concurrent_downloads=2,
         retry_attempts=2,
         retry_delay=0.1
     )
+    yield service
+    await service.close()
 
 
 class TestDocumentStorageService:
     """Test cases for DocumentStorageService"""
     
-    def test_init(self, document_storage_service, temp_storage_dir):
+    def test_init(self, document_storage_service, ro_storage_dir):
         """Test service initialization"""
-        assert document_storage_service.storage_path == Path(temp_storage_dir)
+        assert document_storage_service.storage_path == Path(ro_storage_dir)
         assert document_storage_service.max_concurrent_downloads == 2
         assert document_storage_service.retry_attempts == 2
         assert document_storage_service.retry_delay == 0.1
     
+    async def test_init_respects_limits(self, mock_db_session, ro_storage_dir):
+        """Test HTTP connection pool is sized to the download concurrency"""
+        service = DocumentStorageService(
+            db=mock_db_session,
+            storage_path=ro_storage_dir,
+            max_concurrent_downloads=24
+        )
+        
+        pool = service.client._transport._pool
+        assert service.max_concurrent_downloads == 24
+        assert pool._max_connections == 48
+        assert pool._max_keepalive_connections == 24
+        
+        await service.close()
+    
+    async def test_init_shares_rate_limiter(self, mock_db_session, ro_storage_dir):
+        """Test scraping and downloads draw from one SEC rate limiter"""
+        shared_limiter = RateLimiter(requests_per_second=9.0)
+        
+        async with DocumentStorageService(db=mock_db_session, storage_path=ro_storage_dir) as own:
+            assert own._scraper.rate_limiter is own.rate_limiter
+        
+        async with DocumentStorageService(
+            db=mock_db_session, storage_path=ro_storage_dir, rate_limiter=shared_limiter
+        ) as shared:
+            assert shared.rate_limiter is shared_limiter
+            assert shared._scraper.rate_limiter is shared_limiter
+    
     def test_generate_file_path(self, document_storage_service, sample_filing):
         """Test file path generation"""
         file_path = document_storage_service._generate_file_path(sample_filing)
@@ -82,6 +161,26 @@ class TestDocumentStorageService:
         
         assert file_path == expected_path
     
+    def test_generate_file_path_creates_directory_once(self, writable_storage_service, monkeypatch):
+        """Test filings sharing a directory only create it for the first path"""
+        mkdir_calls = []
+        original_mkdir = Path.mkdir
+        
+        def counting_mkdir(self, *args, **kwargs):
+            mkdir_calls.append(self)
+            return original_mkdir(self, *args, **kwargs)
+        
+        monkeypatch.setattr(Path, "mkdir", counting_mkdir)
+        
+        first = writable_storage_service._generate_file_path(_make_filing(0))
+        first_path_calls = len(mkdir_calls)
+        second = writable_storage_service._generate_file_path(_make_filing(1))
+        
+        assert first.parent == second.parent
+        assert first.parent.is_dir()
+        assert mkdir_calls[0] == first.parent
+        assert len(mkdir_calls) == first_path_calls
+    
     def test_calculate_content_hash(self, document_storage_service):
         """Test content hash calculation"""
         content = b"test content"
@@ -90,89 +189,134 @@ class TestDocumentStorageService:
         # SHA-256 hash of "test content"
         expected_hash = "6ae8a75555209fd6c44157c0aed8016e763ff435a19cf186f76863140143ff72"
         assert hash_value == expected_hash
+        
+        # Digest should come from the OpenSSL-backed implementation
+        assert OPENSSL_SHA256
+    
+    def test_calculate_content_hash_streaming(self, document_storage_service):
+        """Test content hash calculation from a generator of chunks"""
+        def chunks():
+            yield b"test "
+            yield bytearray(b"con")
+            yield memoryview(b"tent")
+        
+        hash_value = document_storage_service._calculate_content_hash(chunks())
+        
+        expected_hash = "6ae8a75555209fd6c44157c0aed8016e763ff435a19cf186f76863140143ff72"
+        assert hash_value == expected_hash
+    
+    def test_calculate_content_hash_file_object(self, document_storage_service):
+        """Test content hash calculation from a binary file object"""
+        hash_value = document_storage_service._calculate_content_hash(io.BytesIO(b"test content"))
+        
+        expected_hash = "6ae8a75555209fd6c44157c0aed8016e763ff435a19cf186f76863140143ff72"
+        assert hash_value == expected_hash
     
-    def test_detect_document_format(self, document_storage_service):
+    @pytest.mark.parametrize("content_type,file_name,expected", [
+        ("text/html", "test.html", "HTML"),
+        ("application/pdf", "test.pdf", "PDF"),
+        ("application/xml", "test.xml", "XBRL"),
+        # File extension fallback
+        ("application/octet-stream", "test.pdf", "PDF"),
+        # Content types with charset parameters
+        ("text/html; charset=utf-8", "test.txt", "HTML"),
+        ("Application/XML;charset=ISO-8859-1", "test.htm", "XBRL"),
+    ])
+    def test_detect_document_format(self, document_storage_service, content_type, file_name, expected):
         """Test document format detection"""
-        # Test HTML content type
-        format_html = document_storage_service._detect_document_format(
-            "text/html", Path("test.html")
+        document_format = document_storage_service._detect_document_format(
+            content_type, Path(file_name)
         )
-        assert format_html == "HTML"
+        assert document_format == expected
+    
+    async def test_stream_download_to_disk(self, document_storage_service, temp_storage_dir):
+        """Test streaming download sniffs and saves in one pass"""
+        content = b"%PDF-1.7 test document content"
         
-        # Test PDF content type
-        format_pdf = document_storage_service._detect_document_format(
-            "application/pdf", Path("test.pdf")
-        )
-        assert format_pdf == "PDF"
+        def handler(request):
+            return httpx.Response(200, content=content, headers={"content-type": "application/octet-stream"})
         
-        # Test XBRL content type
-        format_xbrl = document_storage_service._detect_document_format(
-            "application/xml", Path("test.xml")
-        )
-        assert format_xbrl == "XBRL"
+        await document_storage_service.client.aclose()
+        document_storage_service.client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        file_path = Path(temp_storage_dir) / "test.pdf"
         
-        # Test file extension fallback
-        format_ext = document_storage_service._detect_document_format(
-            "application/octet-stream", Path("test.pdf")
+        file_size, content_type, sniffed_format = (
+            await document_storage_service._stream_download_to_disk("https://example.com/test.pdf", file_path)
         )
-        assert format_ext == "PDF"
-    
-    @pytest.mark.asyncio
-    async def test_download_document_content_success(self, document_storage_service):
-        """Test successful document download"""
-        mock_response = MagicMock()
-        mock_response.content = b"test document content"
-        mock_response.headers = {"content-type": "text/html"}
-        mock_response.raise_for_status = MagicMock()
-        
-        with patch.object(document_storage_service.client, 'get', return_value=mock_response):
-            content, content_type = await document_storage_service._download_document_content(
-                "https://example.com/test.html"
-            )
-            
-            assert content == b"test document content"
-            assert content_type == "text/html"
+        
+        assert file_size == len(content)
+        assert content_type == "application/octet-stream"
+        assert sniffed_format == "PDF"
+        assert file_path.read_bytes() == content
     
-    @pytest.mark.asyncio
-    async def test_download_document_content_retry(self, document_storage_service):
-        """Test document download with retry logic"""
-        # First call fails, second succeeds
-        mock_response_fail = MagicMock()
-        mock_response_fail.raise_for_status.side_effect = httpx.HTTPStatusError(
-            "404 Not Found", request=MagicMock(), response=MagicMock()
+    async def test_stream_download_large_document(self, document_storage_service, temp_storage_dir):
+        """Test streaming a document larger than the write block writes it in full blocks"""
+        content = b"<html>" + b"x" * (WRITE_BLOCK_SIZE * 2 + 123)
+        
+        await document_storage_service.client.aclose()
+        document_storage_service.client = httpx.AsyncClient(
+            transport=httpx.MockTransport(lambda request: httpx.Response(200, content=content))
         )
+        file_path = Path(temp_storage_dir) / "large.htm"
         
-        mock_response_success = MagicMock()
-        mock_response_success.content = b"test content"
-        mock_response_success.headers = {"content-type": "text/html"}
-        mock_response_success.raise_for_status = MagicMock()
+        write_sizes = []
+        original_open = aiofiles.open
         
-        with patch.object(document_storage_service.client, 'get', 
-                         side_effect=[mock_response_fail, mock_response_success]):
-            content, content_type = await document_storage_service._download_document_content(
-                "https://example.com/test.html"
-            )
+        def recording_open(*args, **kwargs):
+            handle = original_open(*args, **kwargs)
             
-            assert content == b"test content"
-            assert content_type == "text/html"
-    
-    @pytest.mark.asyncio
-    async def test_save_document_to_disk(self, document_storage_service, temp_storage_dir):
-        """Test saving document to disk"""
-        content = b"test document content"
-        file_path = Path(temp_storage_dir) / "test.html"
+            class Recorder:
+                async def __aenter__(self):
+                    f = await handle.__aenter__()
+                    original_write = f.write
+                    
+                    async def write(data):
+                        write_sizes.append(len(data))
+                        return await original_write(data)
+                    
+                    f.write = write
+                    return f
+                
+                async def __aexit__(self, *exc):
+                    return await handle.__aexit__(*exc)
+            
+            return Recorder()
         
-        file_size = await document_storage_service._save_document_to_disk(content, file_path)
+        with patch("app.services.document_storage.aiofiles.open", recording_open):
+            file_size, _, sniffed_format = await document_storage_service._stream_download_to_disk(
+                "https://example.com/large.htm", file_path
+            )
         
         assert file_size == len(content)
-        assert file_path.exists()
+        assert sniffed_format == "HTML"
         assert file_path.read_bytes() == content
+        assert write_sizes == [WRITE_BLOCK_SIZE, WRITE_BLOCK_SIZE, 129]
+    
+    async def test_stream_download_to_disk_retry(self, document_storage_service, temp_storage_dir):
+        """Test streaming download retries after a failed attempt"""
+        responses = iter([
+            httpx.Response(404),
+            httpx.Response(200, content=b"test content", headers={"content-type": "text/html"}),
+        ])
+        
+        await document_storage_service.client.aclose()
+        document_storage_service.client = httpx.AsyncClient(
+            transport=httpx.MockTransport(lambda request: next(responses))
+        )
+        file_path = Path(temp_storage_dir) / "test.html"
+        
+        file_size, content_type, _ = await document_storage_service._stream_download_to_disk(
+            "https://example.com/test.html", file_path
+        )
+        
+        assert file_size == len(b"test content")
+        assert content_type == "text/html"
+        assert file_path.read_bytes() == b"test content"
     
-    @pytest.mark.asyncio
     async def test_check_document_exists(self, document_storage_service, sample_filing):
         """Test checking if document exists"""
         # Mock document repository
-        mock_doc_repo = MagicMock()
+        mock_doc_repo = create_autospec(DocumentRepository, instance=True)
         mock_doc_repo.get_by_accession_number.return_value = None
         document_storage_service.document_repo = mock_doc_repo
         
@@ -183,12 +327,11 @@ class TestDocumentStorageService:
             sample_filing.accession_number
         )
     
-    @pytest.mark.asyncio
     async def test_create_document_record(self, document_storage_service, sample_filing, temp_storage_dir):
         """Test creating document record"""
         # Mock repositories
-        mock_company_repo = MagicMock()
-        mock_doc_repo = MagicMock()
+        mock_company_repo = create_autospec(CompanyRepository, instance=True)
+        mock_doc_repo = create_autospec(DocumentRepository, instance=True)
         
         # Mock company exists
         mock_company = Company(
@@ -217,16 +360,96 @@ class TestDocumentStorageService:
         assert result == mock_document
         mock_company_repo.get.assert_called_once_with(sample_filing.ticker)
         mock_doc_repo.create.assert_called_once()
+        
+        # Company lookup is cached for later filings of the same ticker
+        await document_storage_service._create_document_record(
+            sample_filing, file_path, 1024, "HTML"
+        )
+        assert mock_company_repo.get.call_count == 1
+    
+    async def test_create_document_record_batched(self, mock_db_session, temp_storage_dir, sample_filing):
+        """Test batched document records are buffered and bulk inserted on flush"""
+        service = DocumentStorageService(
+            db=mock_db_session,
+            storage_path=temp_storage_dir,
+            batched=True,
+            flush_threshold=2
+        )
+        service.company_repo = create_autospec(CompanyRepository, instance=True)
+        service.document_repo = create_autospec(DocumentRepository, instance=True)
+        file_path = Path(temp_storage_dir) / "test.html"
+        
+        first = await service._create_document_record(sample_filing, file_path, 1024, "HTML")
+        second = await service._create_document_record(sample_filing, file_path, 1024, "HTML")
+        
+        assert first.id is not None
+        assert service._pending_docs == [first, second]
+        mock_db_session.bulk_save_objects.assert_not_called()
+        
+        flushed = await service._flush_documents()
+        
+        assert flushed == [first, second]
+        mock_db_session.bulk_save_objects.assert_called_once_with([first, second])
+        mock_db_session.commit.assert_called_once()
+        assert service._pending_docs == []
+        service.document_repo.create.assert_not_called()
+        
+        await service.close()
+    
+    async def test_download_and_store_filings_batched(self, mock_db_session, temp_storage_dir):
+        """Test batched downloads report every document once its batch is flushed"""
+        service = DocumentStorageService(
+            db=mock_db_session,
+            storage_path=temp_storage_dir,
+            batched=True,
+            flush_threshold=2
+        )
+        service.company_repo = create_autospec(CompanyRepository, instance=True)
+        service._check_document_exists = AsyncMock(return_value=None)
+        service._stream_download_to_disk = AsyncMock(return_value=(13, "text/html", "HTML"))
+        
+        filings = [_make_filing(i) for i in range(len(BASE_DATES))]
+        result = await service.download_and_store_filings(filings)
+        
+        assert sorted(doc.accession_number for doc in result) == [f.accession_number for f in filings]
+        assert mock_db_session.bulk_save_objects.call_count == 2  # full batch and final partial batch
+        
+        await service.close()
+    
+    async def test_download_and_store_filings_batched_flush_failure(self, mock_db_session, temp_storage_dir):
+        """Test documents from a failed batch flush are not reported and their files are removed"""
+        service = DocumentStorageService(
+            db=mock_db_session,
+            storage_path=temp_storage_dir,
+            batched=True,
+            flush_threshold=2
+        )
+        service.company_repo = create_autospec(CompanyRepository, instance=True)
+        service._check_document_exists = AsyncMock(return_value=None)
+        
+        async def fake_download(url, file_path):
+            file_path.write_bytes(b"<html></html>")
+            return 13, "text/html", "HTML"
+        
+        service._stream_download_to_disk = fake_download
+        mock_db_session.bulk_save_objects.side_effect = SQLAlchemyError("insert failed")
+        
+        filings = [_make_filing(i) for i in range(len(BASE_DATES))]
+        result = await service.download_and_store_filings(filings)
+        
+        assert result == []
+        assert mock_db_session.rollback.call_count == 2  # full batch and final partial batch
+        assert not any(path.is_file() for path in Path(temp_storage_dir).rglob("*"))
+        
+        await service.close()
     
-    @pytest.mark.asyncio
     async def test_download_and_store_filing_success(self, document_storage_service, sample_filing):
         """Test successful filing download and storage"""
         # Mock all dependencies
         document_storage_service._check_document_exists = AsyncMock(return_value=None)
-        document_storage_service._download_document_content = AsyncMock(
-            return_value=(b"test content", "text/html")
+        document_storage_service._stream_download_to_disk = AsyncMock(
+            return_value=(1024, "text/html", "HTML")
         )
-        document_storage_service._save_document_to_disk = AsyncMock(return_value=1024)
         
         mock_document = Document(id="test-doc-id")
         document_storage_service._create_document_record = AsyncMock(return_value=mock_document)
@@ -235,11 +458,9 @@ class TestDocumentStorageService:
         
         assert result == mock_document
         document_storage_service._check_document_exists.assert_called_once_with(sample_filing)
-        document_storage_service._download_document_content.assert_called_once_with(
-            sample_filing.document_url
-        )
+        document_storage_service._stream_download_to_disk.assert_called_once()
+        assert document_storage_service._stream_download_to_disk.call_args.args[0] == sample_filing.document_url
     
-    @pytest.mark.asyncio
     async def test_download_and_store_filing_already_exists(self, document_storage_service, sample_filing):
         """Test filing download when document already exists"""
         existing_doc = Document(id="existing-doc-id")
@@ -250,23 +471,10 @@ class TestDocumentStorageService:
         assert result == existing_doc
         document_storage_service._check_document_exists.assert_called_once_with(sample_filing)
     
-    @pytest.mark.asyncio
     async def test_download_and_store_filings_multiple(self, document_storage_service):
         """Test downloading multiple filings"""
         # Create sample filings
-        filings = [
-            Filing(
-                accession_number=f"test-{i}",
-                filing_type="10-K",
-                filing_date=datetime(2023, 1, i+1),
-                period_end=None,
-                document_url=f"https://example.com/doc{i}.html",
-                ticker="TEST",
-                company_name="Test Company",
-                cik="0000123456"
-            )
-            for i in range(3)
-        ]
+        filings = [_make_filing(i) for i in range(len(BASE_DATES))]
         
         # Mock successful downloads
         mock_documents = [Document(id=f"doc-{i}") for i in range(3)]
@@ -283,15 +491,39 @@ class TestDocumentStorageService:
             filings, progress_callback
         )
         
+        # Workers finish in any order
         assert len(result) == 3
-        assert all(doc in mock_documents for doc in result)
+        assert {doc.id for doc in result} == {doc.id for doc in mock_documents}
         
-        # Check progress was tracked
+        # Check progress was tracked; first and last updates are never coalesced
         assert len(progress_calls) > 0
         assert progress_calls[0] == ("downloading", 0, 3)
         assert progress_calls[-1] == ("completed", 3, 3)
+        
+        # Back-to-back completions are coalesced rather than reported one by one
+        assert len(progress_calls) < len(filings) + 2
+    
+    async def test_download_and_store_filings_callback_per_call(self, document_storage_service):
+        """Test a progress callback only hears about the call it was passed to"""
+        document_storage_service.download_and_store_filing = AsyncMock(
+            side_effect=[Document(id="doc-0"), Document(id="doc-1")]
+        )
+        first_calls = []
+        second_calls = []
+        
+        await document_storage_service.download_and_store_filings(
+            [_make_filing(0)], lambda *args: first_calls.append(args)
+        )
+        first_run_calls = list(first_calls)
+        await document_storage_service.download_and_store_filings(
+            [_make_filing(1)], lambda *args: second_calls.append(args)
+        )
+        
+        assert first_calls == first_run_calls
+        assert second_calls[0] == ("downloading", 0, 1)
+        assert second_calls[-1] == ("completed", 1, 1)
+        assert document_storage_service._progress_callbacks == []
     
-    @pytest.mark.asyncio
     async def test_process_company_filings_success(self, document_storage_service):
         """Test complete company filing processing workflow"""
         ticker = "AAPL"
@@ -313,34 +545,31 @@ class TestDocumentStorageService:
         
         mock_documents = [Document(id="test-doc")]
         
-        with patch('app.services.document_storage.SECEdgarScraper') as mock_scraper_class:
-            mock_scraper = AsyncMock()
-            mock_scraper.scrape_filings.return_value = mock_filings
-            mock_scraper_class.return_value.__aenter__.return_value = mock_scraper
-            
-            document_storage_service.download_and_store_filings = AsyncMock(
-                return_value=mock_documents
-            )
-            
-            # Track progress calls
-            progress_calls = []
-            async def progress_callback(status, current, total):
-                progress_calls.append((status, current, total))
-            
-            result = await document_storage_service.process_company_filings(
-                ticker, years, progress_callback=progress_callback
-            )
-            
-            assert result["ticker"] == ticker
-            assert result["status"] == "completed"
-            assert result["filings_found"] == 1
-            assert result["documents_stored"] == 1
-            assert result["error"] is None
-            
-            # Check progress was tracked
-            assert len(progress_calls) >= 3  # scraping, downloading, completed
+        document_storage_service._scraper.scrape_filings = AsyncMock(return_value=mock_filings)
+        document_storage_service.download_and_store_filings = AsyncMock(
+            return_value=mock_documents
+        )
+        
+        # Track progress calls
+        progress_calls = []
+        async def progress_callback(status, current, total):
+            progress_calls.append((status, current, total))
+        
+        result = await document_storage_service.process_company_filings(
+            ticker, years, progress_callback=progress_callback
+        )
+        
+        assert result["ticker"] == ticker
+        assert result["status"] == "completed"
+        assert result["filings_found"] == 1
+        assert result["documents_stored"] == 1
+        assert result["error"] is None
+        document_storage_service._scraper.scrape_filings.assert_called_once_with(ticker, years, None)
+        
+        # Check progress was tracked
+        assert len(progress_calls) >= 3  # scraping, downloading, completed
     
-    def test_get_storage_statistics(self, document_storage_service, temp_storage_dir):
+    def test_get_storage_statistics(self, writable_storage_service, temp_storage_dir):
         """Test storage statistics calculation"""
         # Create some test files
         test_file = Path(temp_storage_dir) / "test.txt"
@@ -348,30 +577,59 @@ class TestDocumentStorageService:
         
         # Mock database statistics
         mock_db_stats = {"total_documents": 5, "processed_documents": 3}
-        document_storage_service.document_repo.get_filing_statistics = MagicMock(
+        writable_storage_service.document_repo.get_filing_statistics = MagicMock(
             return_value=mock_db_stats
         )
         
-        stats = document_storage_service.get_storage_statistics()
+        stats = writable_storage_service.get_storage_statistics()
         
-        assert stats["storage_path"] == str(document_storage_service.storage_path)
+        assert stats["storage_path"] == str(writable_storage_service.storage_path)
         assert stats["total_files"] == 1
         assert stats["total_size_bytes"] > 0
         assert stats["database_stats"] == mock_db_stats
     
-    @pytest.mark.asyncio
-    async def test_cleanup_orphaned_files(self, document_storage_service, temp_storage_dir):
+    async def test_cleanup_orphaned_files(self, writable_storage_service, temp_storage_dir):
         """Test cleanup of orphaned files"""
         # Create test file
         test_file = Path(temp_storage_dir) / "orphaned.txt"
         test_file.write_text("orphaned content")
         
-        # Mock database query to return no matching document
-        mock_query = MagicMock()
-        mock_query.filter.return_value.first.return_value = None
-        document_storage_service.db.query.return_value = mock_query
+        # Mock database to return no known file paths
+        writable_storage_service.db.execute.return_value = []
         
-        cleaned_count = await document_storage_service.cleanup_orphaned_files()
+        cleaned_count = await writable_storage_service.cleanup_orphaned_files()
         
         assert cleaned_count == 1
-        assert not test_file.exists()
\ No newline at end of file
+        assert not test_file.exists()
+    
+    async def test_cleanup_orphaned_files_keeps_known_files(self, writable_storage_service, temp_storage_dir):
+        """Test cleanup leaves files that have database records"""
+        known_file = Path(temp_storage_dir) / "AAPL" / "known.html"
+        known_file.parent.mkdir()
+        known_file.write_text("known content")
+        orphaned_file = Path(temp_storage_dir) / "orphaned.txt"
+        orphaned_file.write_text("orphaned content")
+        
+        writable_storage_service.db.execute.return_value = [(str(known_file),)]
+        
+        cleaned_count = await writable_storage_service.cleanup_orphaned_files()
+        
+        assert cleaned_count == 1
+        assert known_file.exists()
+        assert not orphaned_file.exists()
+    
+    async def test_cleanup_orphaned_files_keeps_relative_paths(self, writable_storage_service, temp_storage_dir):
+        """Test cleanup matches relative stored paths against the storage root"""
+        known_file = Path(temp_storage_dir) / "AAPL" / "2023" / "10-K" / "known.htm"
+        known_file.parent.mkdir(parents=True)
+        known_file.write_text("known content")
+        
+        # Recorded relative to another working directory's ./data/documents
+        writable_storage_service.db.execute.return_value = [
+            (os.path.join("data", "documents", "AAPL", "2023", "10-K", "known.htm"),)
+        ]
+        
+        cleaned_count = await writable_storage_service.cleanup_orphaned_files()
+        
+        assert cleaned_count == 0
+        assert known_file.exists()
\ No newline at end of file
@@ -4,16 +4,18 @@ Integration tests for processing API endpoints.
 
 import pytest
 from fastapi.testclient import TestClient
-from unittest.mock import patch, MagicMock
+from unittest.mock import MagicMock
 
 from app.main import app
+from app.api.companies import get_company_service, get_processing_service_dep
 from app.services.processing_service import ProcessingStatus, ProcessingPhase
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def client():
-    """Create test client"""
-    return TestClient(app)
+    """Create test client shared by all tests; dependencies are overridden per test"""
+    with TestClient(app) as test_client:
+        yield test_client
 
 
 @pytest.fixture
@@ -30,6 +32,15 @@ def mock_processing_service():
     return MagicMock()
 
 
+@pytest.fixture(autouse=True)
+def override_dependencies(mock_company_service, mock_processing_service):
+    """Route the API dependencies to the mock services"""
+    app.dependency_overrides[get_company_service] = lambda: mock_company_service
+    app.dependency_overrides[get_processing_service_dep] = lambda: mock_processing_service
+    yield
+    app.dependency_overrides.clear()
+
+
 class TestProcessingAPI:
     """Test cases for processing API endpoints"""
     
@@ -44,12 +55,10 @@ class TestProcessingAPI:
         
         mock_processing_service.start_processing = mock_start_processing
         
-        with patch('app.api.companies.get_company_service', return_value=mock_company_service):
-            with patch('app.api.companies.get_processing_service_dep', return_value=mock_processing_service):
-                response = client.post("/api/companies/process", json={
-                    "ticker": "AAPL",
-                    "timeRange": 3
-                })
+        response = client.post("/api/companies/process", json={
+            "ticker": "AAPL",
+            "timeRange": 3
+        })
         
         assert response.status_code == 200
         data = response.json()
@@ -59,31 +68,22 @@ class TestProcessingAPI:
         assert data["timeRange"] == 3
         assert "status" in data
     
-    def test_start_processing_invalid_ticker(self, client, mock_company_service, mock_processing_service):
-        """Test processing start with invalid ticker"""
-        mock_company_service.validate_ticker.return_value = (False, None)
-        
-        with patch('app.api.companies.get_company_service', return_value=mock_company_service):
-            with patch('app.api.companies.get_processing_service_dep', return_value=mock_processing_service):
-                response = client.post("/api/companies/process", json={
-                    "ticker": "INVALID",
-                    "timeRange": 3
-                })
-        
-        assert response.status_code == 404
-        assert "not found" in response.json()["detail"]
-    
-    def test_start_processing_invalid_time_range(self, client, mock_company_service, mock_processing_service):
-        """Test processing start with invalid time range"""
-        with patch('app.api.companies.get_company_service', return_value=mock_company_service):
-            with patch('app.api.companies.get_processing_service_dep', return_value=mock_processing_service):
-                response = client.post("/api/companies/process", json={
-                    "ticker": "AAPL",
-                    "timeRange": 7
-                })
-        
-        assert response.status_code == 400
-        assert "Time range must be 1, 3, or 5 years" in response.json()["detail"]
+    @pytest.mark.parametrize("ticker,time_range,validation,status_code,detail", [
+        ("INVALID", 3, (False, None), 404, "not found"),
+        ("AAPL", 7, (True, "AAPL"), 400, "Time range must be 1, 3, or 5 years"),
+    ], ids=["invalid_ticker", "invalid_time_range"])
+    def test_start_processing_invalid_input(self, client, mock_company_service, ticker, time_range,
+                                            validation, status_code, detail):
+        """Test processing start with an invalid ticker or time range"""
+        mock_company_service.validate_ticker.return_value = validation
+        
+        response = client.post("/api/companies/process", json={
+            "ticker": ticker,
+            "timeRange": time_range
+        })
+        
+        assert response.status_code == status_code
+        assert detail in response.json()["detail"]
     
     def test_get_processing_status_success(self, client, mock_company_service, mock_processing_service):
         """Test successful status retrieval"""
@@ -92,9 +92,7 @@ class TestProcessingAPI:
         mock_status.progress = 25
         mock_processing_service.get_processing_status.return_value = mock_status
         
-        with patch('app.api.companies.get_company_service', return_value=mock_company_service):
-            with patch('app.api.companies.get_processing_service_dep', return_value=mock_processing_service):
-                response = client.get("/api/companies/AAPL/status")
+        response = client.get("/api/companies/AAPL/status")
         
         assert response.status_code == 200
         data = response.json()
@@ -106,9 +104,7 @@ class TestProcessingAPI:
         """Test status retrieval when no processing found"""
         mock_processing_service.get_processing_status.return_value = None
         
-        with patch('app.api.companies.get_company_service', return_value=mock_company_service):
-            with patch('app.api.companies.get_processing_service_dep', return_value=mock_processing_service):
-                response = client.get("/api/companies/AAPL/status")
+        response = client.get("/api/companies/AAPL/status")
         
         assert response.status_code == 200
         data = response.json()
@@ -123,8 +119,7 @@ class TestProcessingAPI:
         mock_status.progress = 100
         mock_processing_service.get_processing_status.return_value = mock_status
         
-        with patch('app.api.companies.get_processing_service_dep', return_value=mock_processing_service):
-            response = client.get("/api/companies/jobs/test-job-id/status")
+        response = client.get("/api/companies/jobs/test-job-id/status")
         
         assert response.status_code == 200
         data = response.json()
@@ -136,8 +131,7 @@ class TestProcessingAPI:
         """Test job status retrieval when job not found"""
         mock_processing_service.get_processing_status.return_value = None
         
-        with patch('app.api.companies.get_processing_service_dep', return_value=mock_processing_service):
-            response = client.get("/api/companies/jobs/nonexistent/status")
+        response = client.get("/api/companies/jobs/nonexistent/status")
         
         assert response.status_code == 404
         assert "not found" in response.json()["detail"]
@@ -146,8 +140,7 @@ class TestProcessingAPI:
         """Test successful job cancellation"""
         mock_processing_service.cancel_processing.return_value = True
         
-        with patch('app.api.companies.get_processing_service_dep', return_value=mock_processing_service):
-            response = client.post("/api/companies/jobs/test-job-id/cancel")
+        response = client.post("/api/companies/jobs/test-job-id/cancel")
         
         assert response.status_code == 200
         data = response.json()
@@ -158,8 +151,7 @@ class TestProcessingAPI:
         """Test job cancellation when job not found"""
         mock_processing_service.cancel_processing.return_value = False
         
-        with patch('app.api.companies.get_processing_service_dep', return_value=mock_processing_service):
-            response = client.post("/api/companies/jobs/nonexistent/cancel")
+        response = client.post("/api/companies/jobs/nonexistent/cancel")
         
         assert response.status_code == 404
         assert "not found" in response.json()["detail"]
@@ -170,8 +162,7 @@ class TestProcessingAPI:
         mock_status2 = ProcessingStatus("MSFT", 1, "job-2")
         mock_processing_service.get_all_jobs.return_value = [mock_status1, mock_status2]
         
-        with patch('app.api.companies.get_processing_service_dep', return_value=mock_processing_service):
-            response = client.get("/api/companies/jobs")
+        response = client.get("/api/companies/jobs")
         
         assert response.status_code == 200
         data = response.json()
@@ -4,25 +4,120 @@ Tests for processing service.
 
 import pytest
 import asyncio
+import re
+from types import SimpleNamespace
 from unittest.mock import AsyncMock, MagicMock, patch
-from datetime import datetime
+from datetime import datetime, timedelta
 
 from app.services.processing_service import ProcessingService, ProcessingStatus, ProcessingPhase
-from app.repositories.manager import RepositoryManager
 
 
-@pytest.fixture
+TIME_RANGE_RE = re.compile(r"Time range must be 1, 3, or 5 years")
+_BOOM = RuntimeError("Test error")
+
+
+@pytest.fixture(scope="module")
+def event_loop():
+    """Share one event loop across the module's async tests"""
+    loop = asyncio.new_event_loop()
+    yield loop
+    loop.close()
+
+
+@pytest.fixture(scope="module")
 def mock_repo_manager():
-    """Create mock repository manager"""
-    return MagicMock(spec=RepositoryManager)
+    """Create a lightweight repository manager stub; the service only stores it"""
+    return SimpleNamespace(company=MagicMock(), document=MagicMock(), document_chunk=MagicMock())
 
 
-@pytest.fixture
+@pytest.fixture(scope="module")
 def processing_service(mock_repo_manager):
-    """Create processing service with mocked dependencies"""
+    """Create processing service with mocked dependencies, shared by the module"""
     return ProcessingService(mock_repo_manager)
 
 
+@pytest.fixture(scope="module")
+def _process_mock():
+    """One AsyncMock for the background job, reused by every test in the module"""
+    return AsyncMock()
+
+
+@pytest.fixture
+def mock_process(processing_service, _process_mock, monkeypatch):
+    """Replace the background job with the shared AsyncMock, reset for this test"""
+    _process_mock.reset_mock()
+    monkeypatch.setattr(processing_service, "_process_company_documents", _process_mock)
+    return _process_mock
+
+
+@pytest.fixture
+def patched_deps(monkeypatch):
+    """Replace the storage service class and session factory used by background processing"""
+    storage_cls = MagicMock()
+    session_cls = MagicMock()
+    monkeypatch.setattr("app.services.processing_service.DocumentStorageService", storage_cls)
+    monkeypatch.setattr("app.services.processing_service.SessionLocal", session_cls)
+    return storage_cls, session_cls
+
+
+def _stub_status(phase, completed_at, job_id):
+    """Bare job record carrying only the fields cleanup_completed_jobs reads"""
+    return SimpleNamespace(phase=phase, completed_at=completed_at, job_id=job_id)
+
+
+@pytest.fixture
+def seeded_status(processing_service):
+    """Register one pending AAPL job with the service"""
+    status = ProcessingStatus("AAPL", 3)
+    processing_service._processing_jobs[status.job_id] = status
+    return status
+
+
+@pytest.fixture
+def no_background_tasks(monkeypatch):
+    """Close job coroutines instead of scheduling them on the event loop"""
+    monkeypatch.setattr(
+        "app.services.processing_service.asyncio.create_task",
+        lambda coro: coro.close() or MagicMock()
+    )
+
+
+class FakeDateTime(datetime):
+    """datetime whose utcnow() reads a clock the test controls"""
+    now = datetime(2025, 1, 1)
+    
+    @classmethod
+    def utcnow(cls):
+        return cls.now
+
+
+@pytest.fixture(scope="module", autouse=True)
+def _frozen_datetime():
+    """Serve the processing service's utcnow() from FakeDateTime for the whole module"""
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setattr("app.services.processing_service.datetime", FakeDateTime)
+        yield
+
+
+@pytest.fixture
+def frozen_clock(monkeypatch):
+    """Expose the frozen clock; advance it by setting FakeDateTime.now"""
+    monkeypatch.setattr(FakeDateTime, "now", FakeDateTime.now)
+    return FakeDateTime
+
+
+@pytest.fixture(autouse=True)
+async def _reset_processing_service(processing_service):
+    """Cancel background tasks and clear job state left behind by each test"""
+    yield
+    tasks = [task for task in processing_service._job_tasks.values() if isinstance(task, asyncio.Task)]
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    processing_service._processing_jobs.clear()
+    processing_service._job_tasks.clear()
+
+
 class TestProcessingStatus:
     """Test cases for ProcessingStatus"""
     
@@ -50,14 +145,17 @@ class TestProcessingStatus:
         
         result = status.to_dict()
         
-        assert result["jobId"] == "test-job-id"
-        assert result["ticker"] == "AAPL"
-        assert result["timeRange"] == 3
-        assert result["phase"] == "pending"
-        assert result["progress"] == 50
-        assert result["documentsFound"] == 10
+        expected = {
+            "jobId": "test-job-id",
+            "ticker": "AAPL",
+            "timeRange": 3,
+            "phase": "pending",
+            "progress": 50,
+            "documentsFound": 10,
+            "completedAt": None,
+        }
+        assert {key: result[key] for key in expected} == expected
         assert "startedAt" in result
-        assert result["completedAt"] is None
 
 
 class TestProcessingService:
@@ -70,32 +168,28 @@ class TestProcessingService:
         assert len(processing_service._processing_jobs) == 0
         assert len(processing_service._job_tasks) == 0
     
-    @pytest.mark.asyncio
-    async def test_start_processing_success(self, processing_service):
+    async def test_start_processing_success(self, processing_service, mock_process, no_background_tasks):
         """Test successful processing start"""
         ticker = "AAPL"
         time_range = 3
         
-        # Mock the background processing task
-        with patch.object(processing_service, '_process_company_documents', new_callable=AsyncMock) as mock_process:
-            status = await processing_service.start_processing(ticker, time_range)
-            
-            assert status.ticker == ticker
-            assert status.time_range == time_range
-            assert status.phase == ProcessingPhase.PENDING
-            assert status.job_id in processing_service._processing_jobs
-            
-            # Verify background task was started
-            mock_process.assert_called_once()
+        status = await processing_service.start_processing(ticker, time_range)
+        
+        assert status.ticker == ticker
+        assert status.time_range == time_range
+        assert status.phase == ProcessingPhase.PENDING
+        assert status.job_id in processing_service._processing_jobs
+        
+        # Verify background task was started
+        mock_process.assert_called_once()
     
-    @pytest.mark.asyncio
-    async def test_start_processing_invalid_time_range(self, processing_service):
+    @pytest.mark.parametrize("time_range", [0, 2, 7])
+    async def test_start_processing_invalid_time_range(self, processing_service, time_range):
         """Test processing start with invalid time range"""
-        with pytest.raises(ValueError, match="Time range must be 1, 3, or 5 years"):
-            await processing_service.start_processing("AAPL", 7)
+        with pytest.raises(ValueError, match=TIME_RANGE_RE):
+            await processing_service.start_processing("AAPL", time_range)
     
-    @pytest.mark.asyncio
-    async def test_start_processing_already_in_progress(self, processing_service):
+    async def test_start_processing_already_in_progress(self, processing_service, mock_process, no_background_tasks):
         """Test starting processing when already in progress"""
         ticker = "AAPL"
         time_range = 3
@@ -105,42 +199,27 @@ class TestProcessingService:
         existing_status.phase = ProcessingPhase.SCRAPING
         processing_service._processing_jobs[existing_status.job_id] = existing_status
         
-        with patch.object(processing_service, '_process_company_documents', new_callable=AsyncMock):
-            status = await processing_service.start_processing(ticker, time_range)
-            
-            # Should return existing job
-            assert status.job_id == existing_status.job_id
-            assert status.phase == ProcessingPhase.SCRAPING
-    
-    def test_get_processing_status_by_ticker(self, processing_service):
-        """Test getting processing status by ticker"""
-        ticker = "AAPL"
-        status = ProcessingStatus(ticker, 3)
-        processing_service._processing_jobs[status.job_id] = status
-        
-        result = processing_service.get_processing_status(ticker=ticker)
+        status = await processing_service.start_processing(ticker, time_range)
         
-        assert result is not None
-        assert result.ticker == ticker
-        assert result.job_id == status.job_id
+        # Should return existing job without starting another
+        assert status.job_id == existing_status.job_id
+        assert status.phase == ProcessingPhase.SCRAPING
+        mock_process.assert_not_called()
     
-    def test_get_processing_status_by_job_id(self, processing_service):
-        """Test getting processing status by job ID"""
-        status = ProcessingStatus("AAPL", 3)
-        processing_service._processing_jobs[status.job_id] = status
-        
-        result = processing_service.get_processing_status(job_id=status.job_id)
+    @pytest.mark.parametrize("key,value,found", [
+        ("ticker", "AAPL", True),
+        ("job_id", None, True),  # None stands for the seeded job's ID
+        ("ticker", "NONEXISTENT", False),
+        ("job_id", "nonexistent-job", False),
+    ])
+    def test_get_processing_status(self, processing_service, seeded_status, key, value, found):
+        """Test getting processing status by ticker or job ID"""
+        if value is None:
+            value = seeded_status.job_id
         
-        assert result is not None
-        assert result.job_id == status.job_id
-    
-    def test_get_processing_status_not_found(self, processing_service):
-        """Test getting processing status when not found"""
-        result = processing_service.get_processing_status(ticker="NONEXISTENT")
-        assert result is None
+        result = processing_service.get_processing_status(**{key: value})
         
-        result = processing_service.get_processing_status(job_id="nonexistent-job")
-        assert result is None
+        assert result is (seeded_status if found else None)
     
     def test_cancel_processing_success(self, processing_service):
         """Test successful processing cancellation"""
@@ -189,49 +268,37 @@ class TestProcessingService:
         assert status1 in jobs
         assert status2 in jobs
     
-    def test_cleanup_completed_jobs(self, processing_service):
+    def test_cleanup_completed_jobs(self, processing_service, frozen_clock):
         """Test cleanup of old completed jobs"""
-        # Create old completed job
-        old_status = ProcessingStatus("AAPL", 3)
-        old_status.phase = ProcessingPhase.COMPLETE
-        old_status.completed_at = datetime.utcnow() - datetime.timedelta(hours=25)
-        
-        # Create recent completed job
-        recent_status = ProcessingStatus("MSFT", 1)
-        recent_status.phase = ProcessingPhase.COMPLETE
-        recent_status.completed_at = datetime.utcnow() - datetime.timedelta(hours=1)
-        
-        # Create active job
-        active_status = ProcessingStatus("GOOGL", 5)
-        active_status.phase = ProcessingPhase.SCRAPING
-        
-        processing_service._processing_jobs[old_status.job_id] = old_status
-        processing_service._processing_jobs[recent_status.job_id] = recent_status
-        processing_service._processing_jobs[active_status.job_id] = active_status
+        now = frozen_clock.now
+        processing_service._processing_jobs.update({
+            "old": _stub_status(ProcessingPhase.COMPLETE, now - timedelta(hours=25), "old"),
+            "recent": _stub_status(ProcessingPhase.COMPLETE, now - timedelta(hours=1), "recent"),
+            "active": _stub_status(ProcessingPhase.SCRAPING, None, "active"),
+        })
         
         cleaned_count = processing_service.cleanup_completed_jobs(max_age_hours=24)
         
         assert cleaned_count == 1
-        assert old_status.job_id not in processing_service._processing_jobs
-        assert recent_status.job_id in processing_service._processing_jobs
-        assert active_status.job_id in processing_service._processing_jobs
+        assert set(processing_service._processing_jobs) == {"recent", "active"}
     
-    @pytest.mark.asyncio
-    async def test_update_progress(self, processing_service):
+    async def test_update_progress(self, processing_service, frozen_clock):
         """Test progress update functionality"""
         status = ProcessingStatus("AAPL", 3)
+        frozen_clock.now += timedelta(seconds=30)
         
         await processing_service._update_progress(status, "scraping", 25, 100)
         
         assert status.phase == ProcessingPhase.SCRAPING
         assert status.progress == 25
-        assert status.estimated_time_remaining is not None
+        # 30 seconds for 25% leaves 90 seconds at the same rate
+        assert status.estimated_time_remaining == 90
     
-    @pytest.mark.asyncio
-    async def test_process_company_documents_success(self, processing_service):
+    async def test_process_company_documents_success(self, processing_service, patched_deps):
         """Test successful document processing workflow"""
         status = ProcessingStatus("AAPL", 3)
         filing_types = ["10-K", "10-Q"]
+        storage_cls, _ = patched_deps
         
         # Mock document storage service
         mock_result = {
@@ -240,56 +307,51 @@ class TestProcessingService:
             "documents_stored": 5
         }
         
-        with patch('app.services.processing_service.DocumentStorageService') as mock_storage_class:
-            mock_storage = AsyncMock()
-            mock_storage.process_company_filings.return_value = mock_result
-            mock_storage_class.return_value.__aenter__.return_value = mock_storage
-            
-            with patch('app.services.processing_service.SessionLocal') as mock_session:
-                mock_db = MagicMock()
-                mock_session.return_value.__enter__.return_value = mock_db
-                
-                await processing_service._process_company_documents(status, filing_types)
-                
-                assert status.phase == ProcessingPhase.COMPLETE
-                assert status.progress == 100
-                assert status.documents_found == 5
-                assert status.documents_processed == 5
-                assert status.completed_at is not None
+        storage_cls.return_value.process_company_filings = AsyncMock(return_value=mock_result)
+        
+        await processing_service._process_company_documents(status, filing_types)
+        
+        assert status.phase == ProcessingPhase.COMPLETE
+        assert status.progress == 100
+        assert storage_cls.call_args.kwargs["rate_limiter"] is processing_service._sec_rate_limiter
+        assert status.documents_found == 5
+        assert status.documents_processed == 5
+        assert status.completed_at is not None
     
-    @pytest.mark.asyncio
-    async def test_process_company_documents_error(self, processing_service):
+    async def test_process_company_documents_error(self, processing_service, patched_deps):
         """Test document processing with error"""
         status = ProcessingStatus("AAPL", 3)
         filing_types = ["10-K"]
+        storage_cls, _ = patched_deps
+        
+        storage_cls.return_value.process_company_filings = AsyncMock(side_effect=_BOOM)
         
-        with patch('app.services.processing_service.DocumentStorageService') as mock_storage_class:
-            mock_storage = AsyncMock()
-            mock_storage.process_company_filings.side_effect = Exception("Test error")
-            mock_storage_class.return_value.__aenter__.return_value = mock_storage
-            
-            with patch('app.services.processing_service.SessionLocal') as mock_session:
-                mock_db = MagicMock()
-                mock_session.return_value.__enter__.return_value = mock_db
-                
-                await processing_service._process_company_documents(status, filing_types)
-                
-                assert status.phase == ProcessingPhase.ERROR
-                assert status.error_message == "Test error"
-                assert status.completed_at is not None
-
-
-def test_get_processing_service():
+        await processing_service._process_company_documents(status, filing_types)
+        
+        assert status.phase == ProcessingPhase.ERROR
+        assert status.error_message == str(_BOOM)
+        assert status.completed_at is not None
+
+
+@pytest.fixture(scope="module")
+def processing_singleton():
+    """Build the module-level processing service once against a mocked session"""
+    from app.services import processing_service as module
+    
+    original = module._processing_service
+    module._processing_service = None
+    with patch.object(module, "SessionLocal") as mock_session:
+        yield module.get_processing_service(), mock_session
+    module._processing_service = original
+
+
+def test_get_processing_service(processing_singleton):
     """Test getting processing service singleton"""
     from app.services.processing_service import get_processing_service
     
-    with patch('app.services.processing_service.SessionLocal') as mock_session:
-        mock_db = MagicMock()
-        mock_session.return_value = mock_db
-        
-        service1 = get_processing_service()
-        service2 = get_processing_service()
-        
-        # Should return same instance (singleton)
-        assert service1 is service2
-        assert isinstance(service1, ProcessingService)
\ No newline at end of file
+    service, mock_session = processing_singleton
+    
+    # Should return same instance (singleton) without opening another session
+    assert get_processing_service() is service
+    assert isinstance(service, ProcessingService)
+    mock_session.assert_called_once_with()
\ No newline at end of file
@@ -9,6 +9,13 @@ from sqlalchemy.exc import SQLAlchemyError
 from app.repositories import CompanyRepository, DocumentRepository, DocumentChunkRepository
 
 
+def assert_rows_equal(result, expected):
+    """Assert a lookup returned exactly the expected rows, compared on each expected column value."""
+    rows = [row for row in (result if isinstance(result, list) else [result]) if row is not None]
+    assert len(rows) == len(expected)
+    assert [{key: getattr(row, key) for key in values} for row, values in zip(rows, expected)] == expected
+
+
 class TestCompanyRepository:
     """Test CompanyRepository functionality."""
     
@@ -21,28 +28,18 @@ class TestCompanyRepository:
         assert company.cik_str == 320193
         assert company.is_active is True
     
-    def test_get_by_ticker(self, repo_manager, created_company):
-        """Test getting company by ticker."""
-        company = repo_manager.company.get_by_ticker("AAPL")
-        
-        assert company is not None
-        assert company.ticker == "AAPL"
-        assert company.name == "Apple Inc."
-    
-    def test_get_by_ticker_case_insensitive(self, repo_manager, created_company):
-        """Test getting company by ticker is case insensitive."""
-        company = repo_manager.company.get_by_ticker("aapl")
-        
-        assert company is not None
-        assert company.ticker == "AAPL"
-    
-    def test_get_by_cik(self, repo_manager, created_company):
-        """Test getting company by CIK."""
-        company = repo_manager.company.get_by_cik(320193)
+    @pytest.mark.parametrize("method,arg", [
+        ("get_by_ticker", "AAPL"),
+        ("get_by_ticker", "aapl"),  # case insensitive
+        ("get_by_cik", 320193),
+        ("get_by_sector", "Technology"),
+        ("get_by_industry", "Consumer Electronics"),
+    ])
+    def test_lookup(self, repo_manager, created_company, sample_company_data, method, arg):
+        """Test single-company lookups by ticker, CIK, sector and industry."""
+        result = getattr(repo_manager.company, method)(arg)
         
-        assert company is not None
-        assert company.ticker == "AAPL"
-        assert company.cik_str == 320193
+        assert_rows_equal(result, [sample_company_data])
     
     def test_search_by_name(self, repo_manager, created_company):
         """Test searching companies by name."""
@@ -62,20 +59,6 @@ class TestCompanyRepository:
         assert len(companies) == 1
         assert companies[0].ticker == "AAPL"
     
-    def test_get_by_sector(self, repo_manager, created_company):
-        """Test getting companies by sector."""
-        companies = repo_manager.company.get_by_sector("Technology")
-        
-        assert len(companies) == 1
-        assert companies[0].sector == "Technology"
-    
-    def test_get_by_industry(self, repo_manager, created_company):
-        """Test getting companies by industry."""
-        companies = repo_manager.company.get_by_industry("Consumer Electronics")
-        
-        assert len(companies) == 1
-        assert companies[0].industry == "Consumer Electronics"
-    
     def test_update_market_cap(self, repo_manager, created_company):
         """Test updating market capitalization."""
         new_market_cap = 3500000000000.0
@@ -134,8 +117,7 @@ class TestCompanyRepository:
             }
         ]
         
-        for company_data in companies_data:
-            repo_manager.company.create(company_data)
+        repo_manager.company.bulk_core_insert(companies_data)
         
         # Get similar companies to AAPL
         similar = repo_manager.company.get_similar_companies("AAPL")
@@ -254,8 +236,7 @@ class TestDocumentRepository:
             "processing_status": "completed"
         }
         
-        repo_manager.document.create(doc_data_1)
-        repo_manager.document.create(doc_data_2)
+        repo_manager.document.bulk_core_insert([doc_data_1, doc_data_2])
         
         # Get latest 10-K
         latest = repo_manager.document.get_latest_filing("AAPL", "10-K")
@@ -270,8 +251,8 @@ class TestDocumentChunkRepository:
     
     def test_create_chunk(self, repo_manager, created_document, sample_chunk_data):
         """Test creating a document chunk through repository."""
-        sample_chunk_data["document_id"] = created_document.id
-        chunk = repo_manager.document_chunk.create(sample_chunk_data)
+        chunk_data = dict(sample_chunk_data, document_id=created_document.id)
+        chunk = repo_manager.document_chunk.create(chunk_data)
         
         assert chunk.document_id == created_document.id
         assert chunk.section == "Financial Statements"
@@ -349,6 +330,20 @@ class TestDocumentChunkRepository:
         assert len(chunks) == 1
         assert "revenue" in chunks[0].content.lower()
     
+    def test_search_chunks_by_content_wildcard_term(self, repo_manager, created_document):
+        """Test a wildcard term still matches chunks shorter than the raw term."""
+        chunk_data = {
+            "document_id": created_document.id,
+            "content": "Net revenue rose.",
+            "chunk_index": 2,
+            "character_count": 17
+        }
+        repo_manager.document_chunk.create(chunk_data)
+        
+        chunks = repo_manager.document_chunk.search_chunks_by_content("revenue%%%%%%%%%%%%%%rose")
+        
+        assert [chunk.content for chunk in chunks] == ["Net revenue rose."]
+    
     def test_get_high_confidence_chunks(self, repo_manager, created_chunk):
         """Test getting high confidence chunks."""
         chunks = repo_manager.document_chunk.get_high_confidence_chunks(min_confidence=0.9)
@@ -445,4 +440,40 @@ class TestRepositoryTransactions:
         tickers = [company.ticker for company in created_companies]
         assert "AAPL" in tickers
         assert "MSFT" in tickers
-        assert "GOOGL" in tickers
\ No newline at end of file
+        assert "GOOGL" in tickers
+    
+    def test_bulk_create_rejects_unknown_keys(self, repo_manager):
+        """Test bulk creation raises on a key the model does not define."""
+        with pytest.raises(TypeError, match="bogus"):
+            repo_manager.company.bulk_create([
+                {"ticker": "AAPL", "name": "Apple Inc.", "cik_str": 320193, "bogus": 1}
+            ])
+        
+        assert repo_manager.company.get_by_ticker("AAPL") is None
+    
+    def test_bulk_core_insert(self, repo_manager):
+        """Test bulk insertion without returning ORM objects."""
+        companies_data = [
+            {"ticker": "AAPL", "name": "Apple Inc.", "cik_str": 320193},
+            {"ticker": "MSFT", "name": "Microsoft Corporation", "cik_str": 789019}
+        ]
+        
+        inserted = repo_manager.company.bulk_core_insert(companies_data)
+        
+        assert inserted == 2
+        assert repo_manager.company.get_by_ticker("MSFT").name == "Microsoft Corporation"
+        assert repo_manager.company.bulk_core_insert([]) == 0
+    
+    @pytest.mark.parametrize("reverse", [False, True])
+    def test_bulk_core_insert_mixed_keys(self, repo_manager, reverse):
+        """Test bulk insertion keeps columns that only some rows supply."""
+        companies_data = [
+            {"ticker": "AAPL", "name": "Apple Inc.", "cik_str": 320193},
+            {"ticker": "MSFT", "name": "Microsoft Corporation", "cik_str": 789019, "sector": "Technology"}
+        ]
+        if reverse:
+            companies_data.reverse()
+        
+        assert repo_manager.company.bulk_core_insert(companies_data) == 2
+        assert repo_manager.company.get_by_ticker("AAPL").sector is None
+        assert repo_manager.company.get_by_ticker("MSFT").sector == "Technology"
\ No newline at end of file